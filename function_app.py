@@ -1,24 +1,406 @@
 import azure.functions as func
 import logging
 import json
+import orjson
+import os
 import time
+import requests
+from requests.adapters import HTTPAdapter
+import asyncio
+import functools
+import hashlib
 import random
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+import re
+import sys
+import threading
+from dataclasses import dataclass, fields, replace
+from enum import Enum
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+from typing import List, Dict, Any, Iterator, Optional
+from dateutil.parser import isoparse
+from cachetools import TTLCache
 from azure.identity import DefaultAzureCredential
+from azure.core.credentials import AccessToken
 from azure.core.exceptions import HttpResponseError
+from azure.core.pipeline.transport import RequestsTransport
 from azure.mgmt.compute import ComputeManagementClient
 from azure.mgmt.network import NetworkManagementClient
 from azure.mgmt.advisor import AdvisorManagementClient
 from azure.mgmt.costmanagement import CostManagementClient
+from azure.mgmt.costmanagement.models import (
+    QueryDefinition, QueryTimePeriod, QueryDataset, QueryAggregation,
+    QueryFilter, QueryComparisonExpression, QueryGrouping, QueryResult
+)
 from azure.mgmt.resource import ResourceManagementClient, SubscriptionClient
+from azure.mgmt.resourcegraph import ResourceGraphClient
+from azure.mgmt.resourcegraph.models import QueryRequest, QueryRequestOptions
 from azure.monitor.query import LogsQueryClient
-import os
+
+try:
+    import redis
+except ImportError:  # Redis is optional; cost queries are still cached in-process
+    redis = None
 
 app = func.FunctionApp()
 
+logger = logging.getLogger(__name__)
+
+
+class CachingTokenCredential:
+    """
+    Token credential wrapper that shares access tokens across every client in the worker
+    Each SDK client only caches tokens for itself, so without this a tenant-wide scan
+    re-authenticates (az CLI subprocess / IMDS round-trip) once per client instance
+    """
+    
+    def __init__(self, inner_credential, refresh_margin_seconds: int = 30):
+        self._inner = inner_credential
+        self._refresh_margin = refresh_margin_seconds
+        self._tokens: Dict[tuple, AccessToken] = {}
+        # One lock per cache key, so a slow fetch for one scope/tenant never blocks the others
+        self._key_locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+    
+    def get_token(self, *scopes: str, **kwargs) -> AccessToken:
+        # Claims challenges require a fresh token, never serve them from the cache
+        if kwargs.get('claims'):
+            return self._inner.get_token(*scopes, **kwargs)
+        
+        key = (scopes, tuple(sorted(kwargs.items())))
+        token = self._tokens.get(key)
+        if token is not None and token.expires_on - time.time() > self._refresh_margin:
+            return token
+        
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        # Re-check under the key lock: another thread may have refreshed the token meanwhile
+        with key_lock:
+            token = self._tokens.get(key)
+            if token is None or token.expires_on - time.time() <= self._refresh_margin:
+                token = self._inner.get_token(*scopes, **kwargs)
+                self._tokens[key] = token
+            return token
+    
+    def close(self):
+        self._inner.close()
+
+
+class TenantScopedCredential:
+    """Credential view that requests all tokens for one specific tenant"""
+    
+    def __init__(self, inner_credential, tenant_id: str):
+        self._inner = inner_credential
+        self._tenant_id = tenant_id
+    
+    def get_token(self, *scopes: str, **kwargs) -> AccessToken:
+        kwargs['tenant_id'] = self._tenant_id
+        return self._inner.get_token(*scopes, **kwargs)
+    
+    def close(self):
+        pass
+
+
 # Initialize clients globally
-credential = DefaultAzureCredential()
+# Other tenants are only requested explicitly, when listing subscriptions across tenants
+credential = CachingTokenCredential(DefaultAzureCredential(additionally_allowed_tenants=['*']))
+
+
+def _tenant_credential(tenant_id: Optional[str] = None):
+    """Credential for a tenant's resources; None means the home tenant"""
+    return credential if tenant_id is None else TenantScopedCredential(credential, tenant_id)
+
+# One pooled HTTP session shared by every management client and the ARM batch helper, so
+# calls to management.azure.com reuse connections instead of a TCP+TLS handshake per client
+_arm_session = requests.Session()
+_arm_session.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=128))
+
+
+def _shared_transport() -> RequestsTransport:
+    """Transport over the shared session (clients never close a session they don't own)"""
+    return RequestsTransport(session=_arm_session, session_owner=False)
+
+# Concurrency limits for tenant-wide analysis (overridable through app settings)
+SUBSCRIPTION_CONCURRENCY = int(os.environ.get('SUBSCRIPTION_CONCURRENCY', '8'))
+MAX_CONCURRENT_ARM_CALLS = int(os.environ.get('MAX_CONCURRENT_ARM_CALLS', '16'))
+
+# One long-lived pool runs every ARM collector call for all subscriptions and invocations,
+# bounding in-flight reads without spawning nested per-subscription pools on each request.
+# Tasks on this pool must never wait on other tasks submitted to it.
+_arm_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_ARM_CALLS, thread_name_prefix='arm')
+
+# ARM batch endpoint: up to 20 GETs per POST, counted once against the ARM read quota
+ARM_ENDPOINT = 'https://management.azure.com'
+ARM_SCOPE = f'{ARM_ENDPOINT}/.default'
+ARM_BATCH_API_VERSION = '2020-06-01'
+ARM_BATCH_MAX_REQUESTS = 20
+ARM_BATCH_POLL_TIMEOUT = 120
+ADVISOR_API_VERSION = '2023-01-01'
+
+# Cost Management: resources per batched ResourceId query, the rows we expect in one result page,
+# and how many individual fallback queries may run at once
+SPECIFIC_RESOURCES_CHUNK_SIZE = 20
+COST_QUERY_PAGE_ROWS = 1000
+COST_MAX_PARALLEL = int(os.environ.get('COST_MAX_PARALLEL', '4'))
+CIRCUIT_BREAKER_SKIPPED_ERROR = "Skipped due to rate limiting circuit breaker"
+
+# Longer ranges are split into windows of at most this many days and queried in parallel
+COST_QUERY_WINDOW_DAYS = 30
+
+# Cost Management results change slowly, so identical queries are reused for 5 minutes (budgets for 1),
+# shared across instances through Redis when COST_CACHE_REDIS_URL is configured
+COST_QUERY_CACHE_TTL = 300
+BUDGET_CACHE_TTL = 60
+COST_CACHE_REDIS_URL = os.environ.get('COST_CACHE_REDIS_URL')
+
+# Redis is only an optimization: calls give up after a second, and after a connection failure
+# the instance skips Redis for a minute instead of paying the timeout on every query
+COST_CACHE_REDIS_TIMEOUT = 1.0
+COST_CACHE_REDIS_COOLDOWN = 60
+
+# Resource Graph limits: subscriptions per request and rows per page. Smaller subscription chunks
+# with a pause between them spread large tenants over time and reduce 429s (app-setting overridable)
+RESOURCE_GRAPH_MAX_SUBSCRIPTIONS = int(os.environ.get('RESOURCE_GRAPH_SUBSCRIPTION_CHUNK', '1000'))
+RESOURCE_GRAPH_CHUNK_DELAY = float(os.environ.get('RESOURCE_GRAPH_CHUNK_DELAY', '0'))
+RESOURCE_GRAPH_PAGE_SIZE = 1000
+
+# One Resource Graph query replacing the per-subscription public IP, disk, NIC and snapshot list calls
+ORPHANED_RESOURCES_QUERY = """
+Resources
+| where (type =~ 'microsoft.network/publicipaddresses' and isnull(properties.ipConfiguration) and isnull(properties.natGateway))
+    or (type =~ 'microsoft.compute/disks' and properties.diskState == 'Unattached')
+    or (type =~ 'microsoft.network/networkinterfaces' and isnull(properties.virtualMachine))
+    or type =~ 'microsoft.compute/snapshots'
+| project id, name, type, location, subscriptionId, tags,
+    skuName = tostring(sku.name),
+    allocationMethod = tostring(properties.publicIPAllocationMethod),
+    diskSizeGB = toint(properties.diskSizeGB),
+    timeCreated = tostring(properties.timeCreated)
+"""
+
+# Advisor cost recommendations for every subscription, filtered and projected server-side
+ADVISOR_RECOMMENDATIONS_QUERY = """
+AdvisorResources
+| where type == 'microsoft.advisor/recommendations' and properties.category == 'Cost'
+| project id, name, subscriptionId, properties
+"""
+
+# Image patterns that make a VM eligible for Azure Hybrid Benefit (matched as substrings)
+WINDOWS_SERVER_OFFERS = [
+    'windowsserver', 'windows-server', 'windowsserver-gen2',
+    'windows_server', 'microsoftwindowsserver'
+]
+WINDOWS_CLIENT_SKUS = [
+    'windows-10', 'windows-11', 'win10', 'win11',
+    'rs5-pro', 'rs5-ent', '19h1-pro', '19h1-ent',
+    '20h1-pro', '20h2-pro', '21h1-pro'
+]
+RHEL_OFFERS = ['rhel', 'rhel-byos', 'rhel-ha', 'rhel-sap-ha']
+RHEL_PUBLISHERS = ['redhat', 'red-hat']
+SLES_OFFERS = ['sles', 'sles-byos', 'sles-sap', 'sles-for-sap']
+SLES_PUBLISHERS = ['suse', 'suse-byos']
+
+
+def _compile_substring_matcher(patterns: List[str]) -> re.Pattern:
+    """Compile substring patterns into one alternation so a string is scanned once in C"""
+    return re.compile('|'.join(re.escape(pattern) for pattern in patterns))
+
+
+_WS_OFFER_RE = _compile_substring_matcher(WINDOWS_SERVER_OFFERS)
+_WS_CLIENT_SKU_RE = _compile_substring_matcher(WINDOWS_CLIENT_SKUS)
+_RHEL_OFFER_RE = _compile_substring_matcher(RHEL_OFFERS)
+_RHEL_PUBLISHER_RE = _compile_substring_matcher(RHEL_PUBLISHERS)
+_SLES_OFFER_RE = _compile_substring_matcher(SLES_OFFERS)
+_SLES_PUBLISHER_RE = _compile_substring_matcher(SLES_PUBLISHERS)
+
+
+class _ImageKind(Enum):
+    """AHB-relevant image families"""
+    WINDOWS_SERVER = 'windows_server'
+    RHEL = 'rhel'
+    SLES = 'sles'
+
+
+# Exact offer/publisher names resolve with one dict lookup; other names fall back to substring matching
+_OFFER_KIND: Dict[str, _ImageKind] = {
+    **{offer: _ImageKind.WINDOWS_SERVER for offer in WINDOWS_SERVER_OFFERS},
+    **{offer: _ImageKind.RHEL for offer in RHEL_OFFERS},
+    **{offer: _ImageKind.SLES for offer in SLES_OFFERS}
+}
+_PUBLISHER_KIND: Dict[str, _ImageKind] = {
+    **{publisher: _ImageKind.RHEL for publisher in RHEL_PUBLISHERS},
+    **{publisher: _ImageKind.SLES for publisher in SLES_PUBLISHERS}
+}
+_SKU_IS_CLIENT = frozenset(WINDOWS_CLIENT_SKUS)
+_LINUX_AHB_KINDS = (_ImageKind.RHEL, _ImageKind.SLES)
+
+
+@functools.lru_cache(maxsize=1024)
+def _ahb_eligible_image(os_type: str, publisher: str, offer: str, sku: str) -> bool:
+    """
+    Decide AHB eligibility for a marketplace image (all arguments lowercase)
+    Memoized because a tenant's VMs are built from a small set of images
+    """
+    if os_type == 'windows':
+        # Windows Server offer, excluding Windows client SKUs
+        offer_kind = _OFFER_KIND.get(offer)
+        is_server = (offer_kind is _ImageKind.WINDOWS_SERVER or
+                     (offer_kind is None and _WS_OFFER_RE.search(offer) is not None))
+        if not is_server:
+            return False
+        is_client = sku in _SKU_IS_CLIENT or _WS_CLIENT_SKU_RE.search(sku) is not None
+        return not is_client
+    
+    if os_type == 'linux':
+        # RHEL and SLES only
+        if _OFFER_KIND.get(offer) in _LINUX_AHB_KINDS or _PUBLISHER_KIND.get(publisher) in _LINUX_AHB_KINDS:
+            return True
+        return (_RHEL_OFFER_RE.search(offer) is not None or
+                _RHEL_PUBLISHER_RE.search(publisher) is not None or
+                _SLES_OFFER_RE.search(offer) is not None or
+                _SLES_PUBLISHER_RE.search(publisher) is not None)
+    
+    return False
+
+# Resource type labels, interned once and shared by every finding, filter and summary
+RESOURCE_TYPE_PUBLIC_IP = sys.intern('Public IP')
+RESOURCE_TYPE_MANAGED_DISK = sys.intern('Managed Disk')
+RESOURCE_TYPE_SNAPSHOT = sys.intern('Snapshot')
+RESOURCE_TYPE_NIC = sys.intern('Network Interface')
+RESOURCE_TYPE_VM_WITHOUT_AHB = sys.intern('VM without AHB')
+RESOURCE_TYPE_ADVISOR = sys.intern('Advisor Recommendation')
+
+
+_RG_RE = re.compile(r'/resourceGroups/([^/]+)', re.IGNORECASE)
+
+
+def _rg(resource_id: str) -> str:
+    """Extract the resource group name from an ARM resource ID"""
+    # Interned: the same few resource group names repeat across thousands of resources
+    return sys.intern(_RG_RE.search(resource_id).group(1))
+
+
+@dataclass
+class SubClients:
+    """Management clients bound to a single subscription"""
+    compute: ComputeManagementClient
+    network: NetworkManagementClient
+    advisor: AdvisorManagementClient
+    resource: ResourceManagementClient
+
+
+# Marks OrphanResource fields that don't apply to a resource type, so they are left out of the response
+_UNSET: Any = object()
+
+
+@dataclass(slots=True)
+class OrphanResource:
+    """
+    A single finding (orphaned resource, VM without AHB or Advisor recommendation)
+    Slotted to keep large tenant scans compact; converted to a dict only when serialized
+    """
+    resource_type: str
+    resource_id: Optional[str]
+    name: Optional[str]
+    location: Any = _UNSET
+    resource_group: Any = _UNSET
+    subscription_id: Any = _UNSET
+    subscription_name: Any = _UNSET
+    sku: Any = _UNSET
+    allocation_method: Any = _UNSET
+    disk_size_gb: Any = _UNSET
+    age_days: Any = _UNSET
+    created_date: Any = _UNSET
+    vm_size: Any = _UNSET
+    os_type: Any = _UNSET
+    os_info: Any = _UNSET
+    recommendation_id: Any = _UNSET
+    category: Any = _UNSET
+    impact: Any = _UNSET
+    risk: Any = _UNSET
+    short_description: Any = _UNSET
+    solution: Any = _UNSET
+    impacted_resource: Any = _UNSET
+    potential_savings: Any = _UNSET
+    last_updated: Any = _UNSET
+    tags: Any = _UNSET
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style lookup used by filters and summaries"""
+        value = getattr(self, key, _UNSET)
+        return default if value is _UNSET else value
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Convert to the JSON response shape, skipping fields that don't apply"""
+        return {
+            name: value
+            for name in _ORPHAN_RESOURCE_FIELDS
+            if (value := getattr(self, name)) is not _UNSET
+        }
+
+
+_ORPHAN_RESOURCE_FIELDS = tuple(field.name for field in fields(OrphanResource))
+
+
+# Clients are cached per subscription so warm invocations reuse their pooled connections
+_sub_clients_cache: Dict[tuple, SubClients] = {}
+_sub_clients_lock = threading.Lock()
+
+
+def get_subscription_clients(subscription_id: str, tenant_id: Optional[str] = None) -> SubClients:
+    """
+    Return the (cached) management clients for a subscription
+    tenant_id is set for subscriptions outside the home tenant, whose calls need tenant-scoped tokens
+    """
+    key = (subscription_id, tenant_id)
+    with _sub_clients_lock:
+        clients = _sub_clients_cache.get(key)
+        if clients is None:
+            sub_credential = _tenant_credential(tenant_id)
+            clients = SubClients(
+                compute=ComputeManagementClient(sub_credential, subscription_id, transport=_shared_transport()),
+                network=NetworkManagementClient(sub_credential, subscription_id, transport=_shared_transport()),
+                advisor=AdvisorManagementClient(sub_credential, subscription_id, transport=_shared_transport()),
+                resource=ResourceManagementClient(sub_credential, subscription_id, transport=_shared_transport())
+            )
+            _sub_clients_cache[key] = clients
+        return clients
+
+
+def _retry_after_seconds(error: HttpResponseError) -> Optional[float]:
+    """Return the server-requested retry delay from a throttled response, if any"""
+    return _retry_after_from_headers(getattr(getattr(error, 'response', None), 'headers', None))
+
+
+def _retry_after_from_headers(headers) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or an HTTP-date) into seconds, if present"""
+    retry_after = (headers or {}).get('Retry-After')
+    if retry_after is None:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """True for a 429 response; non-HTTP exceptions fall back to inspecting the message"""
+    if isinstance(error, HttpResponseError):
+        return error.status_code == 429
+    message = str(error)
+    return "429" in message or "Too many requests" in message
+
 
 def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 60.0):
     """
@@ -39,8 +421,14 @@ def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0, max_delay:
                     # Handle rate limiting (429) and server errors (5xx)
                     if e.status_code in [429, 500, 502, 503, 504]:
                         if attempt < max_retries:
-                            # Calculate exponential backoff with jitter
-                            delay = min(base_delay * (2 ** attempt) + random.uniform(0, 1), max_delay)
+                            # Honor the server's Retry-After (never retrying sooner than base_delay, plus a
+                            # little jitter so parallel workers don't retry in lockstep), otherwise use
+                            # exponential backoff with jitter; both are capped at max_delay
+                            retry_after = _retry_after_seconds(e)
+                            if retry_after is not None:
+                                delay = min(max(retry_after, base_delay) + random.uniform(0, 0.5), max_delay)
+                            else:
+                                delay = min(base_delay * (2 ** attempt) + random.uniform(0, 1), max_delay)
                             
                             logging.warning(
                                 f"API call failed (attempt {attempt + 1}/{max_retries + 1}): "
@@ -75,64 +463,165 @@ def retry_with_backoff(max_retries: int = 3, base_delay: float = 1.0, max_delay:
         return wrapper
     return decorator
 
+
+# Idempotent, slow ARM reads (subscription list, Advisor) are reused by warm instances for 15 minutes
+_ttl_cache = TTLCache(maxsize=1024, ttl=900)
+_ttl_cache_lock = threading.Lock()
+
+
+def ttl_cached(key_func):
+    """
+    Decorator caching a function's results in the module TTL cache
+    key_func receives the call arguments and returns the cache key (e.g. the subscription_id);
+    empty results are not cached because the wrapped calls swallow errors into empty lists
+    The wrapper always returns a fresh list, so decorated generators are drained into List results
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__name__, key_func(*args, **kwargs))
+            with _ttl_cache_lock:
+                cached = _ttl_cache.get(key)
+            if cached is not None:
+                return list(cached)
+            
+            result = list(func(*args, **kwargs))
+            if result:
+                with _ttl_cache_lock:
+                    _ttl_cache[key] = result
+            return list(result)
+            
+        return wrapper
+    return decorator
+
+
+def _arm_batch_error(response: requests.Response, message: str) -> HttpResponseError:
+    """
+    HttpResponseError for a raw batch response; a non-error status (e.g. a stuck 202) is reported
+    without a status code so retry_with_backoff does not retry it
+    """
+    error = HttpResponseError(message=message)
+    if response.status_code >= 400:
+        error.status_code = response.status_code
+        error.response = response
+    return error
+
+
+@retry_with_backoff()
+def _arm_batch(batch_requests: List[Dict[str, Any]], tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Send up to ARM_BATCH_MAX_REQUESTS requests through the ARM /batch endpoint
+    All requests must target the same tenant (None for the home tenant)
+    Returns the individual responses in request order
+    """
+    token = _tenant_credential(tenant_id).get_token(ARM_SCOPE).token
+    response = _arm_session.post(
+        f"{ARM_ENDPOINT}/batch?api-version={ARM_BATCH_API_VERSION}",
+        json={'requests': [
+            {'name': str(index), **batch_request} for index, batch_request in enumerate(batch_requests)
+        ]},
+        headers={'Authorization': f'Bearer {token}'},
+        timeout=60
+    )
+    
+    # Long-running batches answer 202 with a Location to poll for the final result
+    deadline = time.monotonic() + ARM_BATCH_POLL_TIMEOUT
+    while response.status_code == 202:
+        location = response.headers.get('Location')
+        if not location:
+            raise _arm_batch_error(response, "ARM batch accepted without a Location to poll")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise _arm_batch_error(response, f"ARM batch did not complete within {ARM_BATCH_POLL_TIMEOUT}s")
+        
+        time.sleep(min(_retry_after_from_headers(response.headers) or 1.0, remaining))
+        response = _arm_session.get(
+            location,
+            headers={'Authorization': f'Bearer {token}'},
+            timeout=60
+        )
+    
+    # Surface HTTP failures as HttpResponseError so retry_with_backoff retries only 429/5xx
+    # (honoring Retry-After) and fails fast on other 4xx
+    if response.status_code >= 400:
+        raise _arm_batch_error(response, f"ARM batch request failed: HTTP {response.status_code} {response.reason}")
+    
+    responses = response.json().get('responses', [])
+    return sorted(responses, key=lambda item: int(item.get('name', 0)))
+
+
 class OrphanedResourceAnalyzer:
     """Analyzes orphaned resources across Azure subscriptions (single or tenant-wide)"""
     
     def __init__(self, subscription_id: Optional[str] = None):
         self.subscription_id = subscription_id
         self.credential = credential
-        self.subscription_client = SubscriptionClient(credential)
-        
-        # Initialize subscription-specific clients only if subscription_id is provided
-        if subscription_id:
-            self.compute_client = ComputeManagementClient(credential, subscription_id)
-            self.network_client = NetworkManagementClient(credential, subscription_id)
-            self.advisor_client = AdvisorManagementClient(credential, subscription_id)
-            self.resource_client = ResourceManagementClient(credential, subscription_id)
-        else:
-            # These will be initialized per subscription during tenant-wide analysis
-            self.compute_client = None
-            self.network_client = None
-            self.advisor_client = None
-            self.resource_client = None
+        self.subscription_client = SubscriptionClient(credential, transport=_shared_transport())
+        # Resource Graph clients per tenant (None = home tenant), created on first use
+        self._graph_clients: Dict[Optional[str], ResourceGraphClient] = {}
+        self._graph_clients_lock = threading.Lock()
+        # Subscription-specific clients are resolved per subscription via get_subscription_clients()
     
+    @ttl_cached(lambda self: None)
     def get_accessible_subscriptions(self) -> List[Dict[str, str]]:
-        """Get all subscriptions accessible to the current credential"""
+        """
+        Get all subscriptions accessible to the current credential
+        The home tenant is listed while the tenant list is fetched; any further tenants are listed in parallel
+        """
+        with ThreadPoolExecutor(max_workers=SUBSCRIPTION_CONCURRENCY) as executor:
+            home_future = executor.submit(self._list_subscriptions, self.subscription_client)
+            tenant_ids = self._list_tenant_ids()
+            subscriptions = home_future.result()
+            
+            listed_tenants = {sub_info['tenant_id'] for sub_info in subscriptions}
+            other_tenants = [tenant_id for tenant_id in tenant_ids if tenant_id not in listed_tenants]
+            for tenant_subscriptions in executor.map(self._list_tenant_subscriptions, other_tenants):
+                subscriptions.extend(tenant_subscriptions)
+        
+        # A subscription can be visible through more than one tenant
+        unique_subscriptions = list({sub_info['subscription_id']: sub_info for sub_info in subscriptions}.values())
+        logging.info(f"Found {len(unique_subscriptions)} accessible subscriptions across {max(len(tenant_ids), 1)} tenants")
+        
+        return unique_subscriptions
+    
+    def _list_tenant_ids(self) -> List[str]:
+        """List the tenants the current credential can access"""
+        try:
+            return [tenant.tenant_id for tenant in self.subscription_client.tenants.list()]
+        except Exception as e:
+            logging.warning(f"Error fetching tenants: {str(e)}")
+            return []
+    
+    def _list_tenant_subscriptions(self, tenant_id: str) -> List[Dict[str, str]]:
+        """
+        List subscriptions in a specific tenant using a tenant-scoped token
+        Each entry records token_tenant_id so its analysis also uses tokens for that tenant
+        """
+        tenant_client = SubscriptionClient(_tenant_credential(tenant_id), transport=_shared_transport())
+        subscriptions = self._list_subscriptions(tenant_client)
+        for sub_info in subscriptions:
+            sub_info['token_tenant_id'] = tenant_id
+        return subscriptions
+    
+    def _list_subscriptions(self, subscription_client: SubscriptionClient) -> List[Dict[str, str]]:
+        """List subscriptions visible to a subscription client"""
         subscriptions = []
         try:
-            for subscription in self.subscription_client.subscriptions.list():
+            for subscription in subscription_client.subscriptions.list():
                 subscriptions.append({
                     'subscription_id': subscription.subscription_id,
                     'display_name': subscription.display_name,
                     'state': subscription.state,
                     'tenant_id': subscription.tenant_id if hasattr(subscription, 'tenant_id') else 'Unknown'
                 })
-            logging.info(f"Found {len(subscriptions)} accessible subscriptions")
         except Exception as e:
             logging.error(f"Error fetching subscriptions: {str(e)}")
         
         return subscriptions
     
-    def _initialize_clients_for_subscription(self, subscription_id: str):
-        """Initialize Azure clients for a specific subscription"""
-        try:
-            self.compute_client = ComputeManagementClient(self.credential, subscription_id)
-            self.network_client = NetworkManagementClient(self.credential, subscription_id)
-            self.advisor_client = AdvisorManagementClient(self.credential, subscription_id)
-            self.resource_client = ResourceManagementClient(self.credential, subscription_id)
-            return True
-        except Exception as e:
-            logging.error(f"Error initializing clients for subscription {subscription_id}: {str(e)}")
-            return False
-        
-    def get_orphaned_public_ips(self, subscription_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_orphaned_public_ips(self, clients: SubClients, subscription_id: str) -> Iterator[OrphanResource]:
         """Find unattached public IP addresses"""
-        orphaned_ips = []
-        
-        # Use the provided subscription_id or fall back to instance subscription_id
-        current_subscription_id = subscription_id or self.subscription_id
-        
-        for ip in self.network_client.public_ip_addresses.list_all():
+        for ip in clients.network.public_ip_addresses.list_all():
             # Check all possible attachment types
             is_attached = (
                 ip.ip_configuration is not None or  # Attached to Network Interface
@@ -142,96 +631,70 @@ class OrphanedResourceAnalyzer:
             )
             
             if not is_attached:
-                orphaned_ips.append({
-                    'resource_type': 'Public IP',
-                    'resource_id': ip.id,
-                    'name': ip.name,
-                    'location': ip.location,
-                    'resource_group': ip.id.split('/')[4],
-                    'subscription_id': current_subscription_id,
-                    'sku': ip.sku.name if ip.sku else 'Basic',
-                    'allocation_method': ip.public_ip_allocation_method,
-                    'tags': ip.tags or {}
-                })
-        
-        return orphaned_ips
+                yield OrphanResource(
+                    resource_type=RESOURCE_TYPE_PUBLIC_IP,
+                    resource_id=ip.id,
+                    name=ip.name,
+                    location=ip.location,
+                    resource_group=_rg(ip.id),
+                    subscription_id=subscription_id,
+                    sku=ip.sku.name if ip.sku else 'Basic',
+                    allocation_method=ip.public_ip_allocation_method,
+                    tags=ip.tags or {}
+                )
     
-    def get_orphaned_disks(self, subscription_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_orphaned_disks(self, clients: SubClients, subscription_id: str) -> Iterator[OrphanResource]:
         """Find unattached managed disks"""
-        orphaned_disks = []
-        
-        # Use the provided subscription_id or fall back to instance subscription_id
-        current_subscription_id = subscription_id or self.subscription_id
-        
-        for disk in self.compute_client.disks.list():
+        for disk in clients.compute.disks.list():
             if disk.disk_state == 'Unattached':
-                orphaned_disks.append({
-                    'resource_type': 'Managed Disk',
-                    'resource_id': disk.id,
-                    'name': disk.name,
-                    'location': disk.location,
-                    'resource_group': disk.id.split('/')[4],
-                    'subscription_id': current_subscription_id,
-                    'disk_size_gb': disk.disk_size_gb,
-                    'sku': disk.sku.name if disk.sku else 'Unknown',
-                    'tags': disk.tags or {}
-                })
-        
-        return orphaned_disks
+                yield OrphanResource(
+                    resource_type=RESOURCE_TYPE_MANAGED_DISK,
+                    resource_id=disk.id,
+                    name=disk.name,
+                    location=disk.location,
+                    resource_group=_rg(disk.id),
+                    subscription_id=subscription_id,
+                    disk_size_gb=disk.disk_size_gb,
+                    sku=disk.sku.name if disk.sku else 'Unknown',
+                    tags=disk.tags or {}
+                )
     
-    def get_orphaned_snapshots(self, subscription_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_orphaned_snapshots(self, clients: SubClients, subscription_id: str) -> Iterator[OrphanResource]:
         """Find old snapshots (older than specified days)"""
-        snapshots = []
-        
-        # Use the provided subscription_id or fall back to instance subscription_id
-        current_subscription_id = subscription_id or self.subscription_id
-        
-        for snapshot in self.compute_client.snapshots.list():
-            age_days = (datetime.now(snapshot.time_created.tzinfo) - snapshot.time_created).days
-            snapshots.append({
-                'resource_type': 'Snapshot',
-                'resource_id': snapshot.id,
-                'name': snapshot.name,
-                'location': snapshot.location,
-                'resource_group': snapshot.id.split('/')[4],
-                'subscription_id': current_subscription_id,
-                'disk_size_gb': snapshot.disk_size_gb,
-                'age_days': age_days,
-                'created_date': snapshot.time_created.isoformat(),
-                'tags': snapshot.tags or {}
-            })
-        
-        return snapshots
+        # SDK timestamps are timezone-aware, so one UTC "now" serves every snapshot
+        now_utc = datetime.now(timezone.utc)
+        for snapshot in clients.compute.snapshots.list():
+            age_days = (now_utc - snapshot.time_created).days
+            yield OrphanResource(
+                resource_type=RESOURCE_TYPE_SNAPSHOT,
+                resource_id=snapshot.id,
+                name=snapshot.name,
+                location=snapshot.location,
+                resource_group=_rg(snapshot.id),
+                subscription_id=subscription_id,
+                disk_size_gb=snapshot.disk_size_gb,
+                age_days=age_days,
+                created_date=snapshot.time_created.isoformat(),
+                tags=snapshot.tags or {}
+            )
     
-    def get_orphaned_nics(self, subscription_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_orphaned_nics(self, clients: SubClients, subscription_id: str) -> Iterator[OrphanResource]:
         """Find unattached network interfaces"""
-        orphaned_nics = []
-        
-        # Use the provided subscription_id or fall back to instance subscription_id
-        current_subscription_id = subscription_id or self.subscription_id
-        
-        for nic in self.network_client.network_interfaces.list_all():
+        for nic in clients.network.network_interfaces.list_all():
             if nic.virtual_machine is None:
-                orphaned_nics.append({
-                    'resource_type': 'Network Interface',
-                    'resource_id': nic.id,
-                    'name': nic.name,
-                    'location': nic.location,
-                    'resource_group': nic.id.split('/')[4],
-                    'subscription_id': current_subscription_id,
-                    'tags': nic.tags or {}
-                })
-        
-        return orphaned_nics
+                yield OrphanResource(
+                    resource_type=RESOURCE_TYPE_NIC,
+                    resource_id=nic.id,
+                    name=nic.name,
+                    location=nic.location,
+                    resource_group=_rg(nic.id),
+                    subscription_id=subscription_id,
+                    tags=nic.tags or {}
+                )
     
-    def get_vms_without_ahb(self, subscription_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def get_vms_without_ahb(self, clients: SubClients, subscription_id: str) -> Iterator[OrphanResource]:
         """Find VMs not using Azure Hybrid Benefit for eligible OS types only"""
-        vms_without_ahb = []
-        
-        # Use the provided subscription_id or fall back to instance subscription_id
-        current_subscription_id = subscription_id or self.subscription_id
-        
-        for vm in self.compute_client.virtual_machines.list_all():
+        for vm in clients.compute.virtual_machines.list_all():
             # Check if VM is eligible for Azure Hybrid Benefit
             if not self._is_ahb_eligible(vm):
                 continue
@@ -241,20 +704,18 @@ class OrphanedResourceAnalyzer:
                 # Get OS details for better reporting
                 os_info = self._get_vm_os_info(vm)
                 
-                vms_without_ahb.append({
-                    'resource_type': 'VM without AHB',
-                    'resource_id': vm.id,
-                    'name': vm.name,
-                    'location': vm.location,
-                    'resource_group': vm.id.split('/')[4],
-                    'subscription_id': current_subscription_id,
-                    'vm_size': vm.hardware_profile.vm_size,
-                    'os_type': vm.storage_profile.os_disk.os_type,
-                    'os_info': os_info,
-                    'tags': vm.tags or {}
-                })
-        
-        return vms_without_ahb
+                yield OrphanResource(
+                    resource_type=RESOURCE_TYPE_VM_WITHOUT_AHB,
+                    resource_id=vm.id,
+                    name=vm.name,
+                    location=vm.location,
+                    resource_group=_rg(vm.id),
+                    subscription_id=subscription_id,
+                    vm_size=vm.hardware_profile.vm_size,
+                    os_type=vm.storage_profile.os_disk.os_type,
+                    os_info=os_info,
+                    tags=vm.tags or {}
+                )
     
     def _is_ahb_eligible(self, vm) -> bool:
         """Check if VM is eligible for Azure Hybrid Benefit"""
@@ -263,60 +724,21 @@ class OrphanedResourceAnalyzer:
             if not vm.storage_profile or not vm.storage_profile.os_disk:
                 return False
             
-            os_type = vm.storage_profile.os_disk.os_type
+            os_type = (vm.storage_profile.os_disk.os_type or '').lower()
+            if os_type not in ('windows', 'linux'):
+                return False
             
-            # Check Windows Server eligibility
-            if os_type and os_type.lower() == 'windows':
-                # Check if it's Windows Server (not client OS)
-                if vm.storage_profile.image_reference:
-                    offer = getattr(vm.storage_profile.image_reference, 'offer', '').lower()
-                    sku = getattr(vm.storage_profile.image_reference, 'sku', '').lower()
-                    
-                    # Windows Server offers
-                    windows_server_offers = [
-                        'windowsserver', 'windows-server', 'windowsserver-gen2',
-                        'windows_server', 'microsoftwindowsserver'
-                    ]
-                    
-                    # Exclude Windows client SKUs
-                    windows_client_skus = [
-                        'windows-10', 'windows-11', 'win10', 'win11',
-                        'rs5-pro', 'rs5-ent', '19h1-pro', '19h1-ent',
-                        '20h1-pro', '20h2-pro', '21h1-pro'
-                    ]
-                    
-                    # Check if it's Windows Server
-                    is_server = any(server_offer in offer for server_offer in windows_server_offers)
-                    is_client = any(client_sku in sku for client_sku in windows_client_skus)
-                    
-                    return is_server and not is_client
-                else:
-                    # If no image reference, assume it might be eligible (custom images)
-                    return True
-            
-            # Check Linux eligibility (RHEL and SLES only)
-            elif os_type and os_type.lower() == 'linux':
-                if vm.storage_profile.image_reference:
-                    offer = getattr(vm.storage_profile.image_reference, 'offer', '').lower()
-                    publisher = getattr(vm.storage_profile.image_reference, 'publisher', '').lower()
-                    
-                    # RHEL eligibility
-                    rhel_offers = ['rhel', 'rhel-byos', 'rhel-ha', 'rhel-sap-ha']
-                    rhel_publishers = ['redhat', 'red-hat']
-                    
-                    # SLES eligibility  
-                    sles_offers = ['sles', 'sles-byos', 'sles-sap', 'sles-for-sap']
-                    sles_publishers = ['suse', 'suse-byos']
-                    
-                    is_rhel = (any(rhel_offer in offer for rhel_offer in rhel_offers) or 
-                              any(rhel_pub in publisher for rhel_pub in rhel_publishers))
-                    
-                    is_sles = (any(sles_offer in offer for sles_offer in sles_offers) or
-                              any(sles_pub in publisher for sles_pub in sles_publishers))
-                    
-                    return is_rhel or is_sles
+            image_reference = vm.storage_profile.image_reference
+            if not image_reference:
+                # If no image reference, assume Windows might be eligible (custom images)
+                return os_type == 'windows'
             
-            return False
+            return _ahb_eligible_image(
+                os_type,
+                (getattr(image_reference, 'publisher', '') or '').lower(),
+                (getattr(image_reference, 'offer', '') or '').lower(),
+                (getattr(image_reference, 'sku', '') or '').lower()
+            )
             
         except Exception as e:
             logging.warning(f"Error checking AHB eligibility for VM {vm.name}: {str(e)}")
@@ -335,38 +757,101 @@ class OrphanedResourceAnalyzer:
         except Exception:
             return "Unknown"
     
-    def get_advisor_cost_recommendations(self, subscription_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    @ttl_cached(lambda self, clients, subscription_id: subscription_id)
+    def get_advisor_cost_recommendations(self, clients: SubClients, subscription_id: str) -> Iterator[OrphanResource]:
         """Get Azure Advisor cost optimization recommendations"""
-        recommendations = []
-        
-        # Use the provided subscription_id or fall back to instance subscription_id
-        current_subscription_id = subscription_id or self.subscription_id
-        
         try:
-            advisor_recs = self.advisor_client.recommendations.list(
+            advisor_recs = clients.advisor.recommendations.list(
                 filter="Category eq 'Cost'"
             )
             
             for rec in advisor_recs:
-                recommendations.append({
-                    'resource_type': 'Advisor Recommendation',
-                    'recommendation_id': rec.id,
-                    'name': rec.name,
-                    'category': rec.category,
-                    'impact': rec.impact,
-                    'risk': rec.risk,
-                    'short_description': rec.short_description.problem if rec.short_description else '',
-                    'solution': rec.short_description.solution if rec.short_description else '',
-                    'impacted_resource': rec.impacted_value,
-                    'resource_id': rec.resource_metadata.resource_id if rec.resource_metadata else '',
-                    'subscription_id': current_subscription_id,
-                    'potential_savings': self._extract_savings(rec.extended_properties) if rec.extended_properties else 0,
-                    'last_updated': rec.last_updated.isoformat() if rec.last_updated else ''
-                })
+                yield OrphanResource(
+                    resource_type=RESOURCE_TYPE_ADVISOR,
+                    recommendation_id=rec.id,
+                    name=rec.name,
+                    category=rec.category,
+                    impact=rec.impact,
+                    risk=rec.risk,
+                    short_description=rec.short_description.problem if rec.short_description else '',
+                    solution=rec.short_description.solution if rec.short_description else '',
+                    impacted_resource=rec.impacted_value,
+                    resource_id=rec.resource_metadata.resource_id if rec.resource_metadata else '',
+                    subscription_id=subscription_id,
+                    potential_savings=self._extract_savings(rec.extended_properties) if rec.extended_properties else 0,
+                    last_updated=rec.last_updated.isoformat() if rec.last_updated else ''
+                )
         except Exception as e:
-            logging.error(f"Error fetching Advisor recommendations for subscription {current_subscription_id}: {str(e)}")
+            logging.error(f"Error fetching Advisor recommendations for subscription {subscription_id}: {str(e)}")
+    
+    def get_advisor_recommendations_via_batch(self, subscription_ids: List[str],
+                                              tenant_id: Optional[str] = None) -> Dict[str, List[OrphanResource]]:
+        """
+        Fetch Advisor cost recommendations for many subscriptions through the ARM /batch endpoint
+        Only subscriptions whose responses all succeeded are returned; callers fall back to the
+        typed Advisor client for the rest
+        """
+        cost_filter = quote("Category eq 'Cost'")
+        pending = [
+            (sub_id, f"/subscriptions/{sub_id}/providers/Microsoft.Advisor/recommendations"
+                     f"?api-version={ADVISOR_API_VERSION}&$filter={cost_filter}")
+            for sub_id in subscription_ids
+        ]
+        recommendations: Dict[str, List[Dict[str, Any]]] = {sub_id: [] for sub_id in subscription_ids}
+        failed = set()
+        
+        while pending:
+            chunk, pending = pending[:ARM_BATCH_MAX_REQUESTS], pending[ARM_BATCH_MAX_REQUESTS:]
+            try:
+                responses = _arm_batch([{'httpMethod': 'GET', 'url': url} for _, url in chunk], tenant_id)
+            except Exception as e:
+                logging.warning(f"ARM batch request failed, falling back to Advisor client: {str(e)}")
+                failed.update(sub_id for sub_id, _ in chunk)
+                continue
+            
+            for (sub_id, _), response in zip(chunk, responses):
+                if response.get('httpStatusCode') != 200:
+                    failed.add(sub_id)
+                    continue
+                
+                content = response.get('content') or {}
+                for rec in content.get('value', []):
+                    recommendations[sub_id].append(self._advisor_recommendation_to_resource(
+                        rec.get('id'), rec.get('name'), rec.get('properties') or {}, sub_id
+                    ))
+                
+                # Follow pagination in a later batch
+                if content.get('nextLink'):
+                    pending.append((sub_id, content['nextLink']))
+        
+        if failed:
+            logging.warning(f"ARM batch could not fetch Advisor recommendations for {len(failed)} subscriptions")
         
-        return recommendations
+        return {sub_id: recs for sub_id, recs in recommendations.items() if sub_id not in failed}
+    
+    def _advisor_recommendation_to_resource(self, rec_id: str, name: str, properties: Dict[str, Any],
+                                            subscription_id: str) -> OrphanResource:
+        """Convert a raw (REST) Advisor recommendation into the same shape as the typed client path"""
+        short_description = properties.get('shortDescription') or {}
+        resource_metadata = properties.get('resourceMetadata') or {}
+        extended_properties = properties.get('extendedProperties')
+        last_updated = properties.get('lastUpdated')
+        
+        return OrphanResource(
+            resource_type=RESOURCE_TYPE_ADVISOR,
+            recommendation_id=rec_id,
+            name=name,
+            category=properties.get('category'),
+            impact=properties.get('impact'),
+            risk=properties.get('risk'),
+            short_description=short_description.get('problem', ''),
+            solution=short_description.get('solution', ''),
+            impacted_resource=properties.get('impactedValue'),
+            resource_id=resource_metadata.get('resourceId', ''),
+            subscription_id=subscription_id,
+            potential_savings=self._extract_savings(extended_properties) if extended_properties else 0,
+            last_updated=isoparse(last_updated).isoformat() if last_updated else ''
+        )
     
     def _extract_savings(self, extended_properties: Dict) -> float:
         """Extract potential savings from extended properties"""
@@ -385,6 +870,173 @@ class OrphanedResourceAnalyzer:
     
 
     
+    def _graph_client(self, tenant_id: Optional[str] = None) -> ResourceGraphClient:
+        """Resource Graph client authenticated for one tenant (None = home tenant)"""
+        with self._graph_clients_lock:
+            client = self._graph_clients.get(tenant_id)
+            if client is None:
+                client = ResourceGraphClient(_tenant_credential(tenant_id), transport=_shared_transport())
+                self._graph_clients[tenant_id] = client
+            return client
+    
+    @retry_with_backoff()
+    def _query_resource_graph_page(self, request: QueryRequest, tenant_id: Optional[str] = None):
+        """Fetch a single Resource Graph result page"""
+        return self._graph_client(tenant_id).resources(request)
+    
+    def _query_resource_graph(self, query: str, subscription_ids: List[str],
+                              tenant_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Run a Resource Graph query across subscriptions of one tenant, following skip tokens"""
+        for start in range(0, len(subscription_ids), RESOURCE_GRAPH_MAX_SUBSCRIPTIONS):
+            if start and RESOURCE_GRAPH_CHUNK_DELAY:
+                time.sleep(RESOURCE_GRAPH_CHUNK_DELAY)
+            
+            subscription_chunk = subscription_ids[start:start + RESOURCE_GRAPH_MAX_SUBSCRIPTIONS]
+            skip_token = None
+            
+            while True:
+                response = self._query_resource_graph_page(QueryRequest(
+                    subscriptions=subscription_chunk,
+                    query=query,
+                    options=QueryRequestOptions(
+                        result_format='objectArray',
+                        top=RESOURCE_GRAPH_PAGE_SIZE,
+                        skip_token=skip_token
+                    )
+                ), tenant_id)
+                yield from response.data
+                
+                skip_token = response.skip_token
+                if not skip_token:
+                    break
+    
+    def get_orphaned_resources_via_graph(self, subscription_ids: List[str],
+                                         tenant_id: Optional[str] = None) -> Optional[Dict[str, List[OrphanResource]]]:
+        """
+        Find unattached public IPs, disks, NICs and all snapshots with one Resource Graph query
+        Returns resources grouped by subscription ID, or None if Resource Graph could not be queried
+        """
+        now_utc = datetime.now(timezone.utc)
+        grouped = self._query_resource_graph_grouped(
+            ORPHANED_RESOURCES_QUERY, subscription_ids,
+            lambda row, subscription_id: self._graph_row_to_resource(row, subscription_id, now_utc),
+            tenant_id
+        )
+        if grouped is None:
+            logging.warning("Falling back to per-subscription ARM calls for orphaned resources")
+            return None
+        
+        logging.info(f"Resource Graph returned {sum(len(r) for r in grouped.values())} orphaned resources "
+                     f"across {len(subscription_ids)} subscriptions")
+        return grouped
+    
+    def get_advisor_recommendations_via_graph(self, subscription_ids: List[str],
+                                              tenant_id: Optional[str] = None) -> Optional[Dict[str, List[OrphanResource]]]:
+        """
+        Fetch Advisor cost recommendations for all subscriptions from the Resource Graph AdvisorResources table
+        Returns recommendations grouped by subscription ID, or None if Resource Graph could not be queried
+        """
+        grouped = self._query_resource_graph_grouped(
+            ADVISOR_RECOMMENDATIONS_QUERY, subscription_ids,
+            lambda row, subscription_id: self._advisor_recommendation_to_resource(
+                row['id'], row['name'], row.get('properties') or {}, subscription_id
+            ),
+            tenant_id
+        )
+        if grouped is None:
+            logging.warning("Falling back to Advisor API for cost recommendations")
+        return grouped
+    
+    def _query_resource_graph_grouped(self, query: str, subscription_ids: List[str], row_converter,
+                                      tenant_id: Optional[str] = None) -> Optional[Dict[str, List[OrphanResource]]]:
+        """Run a Resource Graph query and group the converted rows by subscription ID (None on failure)"""
+        # Resource Graph reports subscription IDs in lowercase
+        subscription_lookup = {sub_id.lower(): sub_id for sub_id in subscription_ids}
+        grouped: Dict[str, List[OrphanResource]] = {sub_id: [] for sub_id in subscription_ids}
+        
+        rows = self._query_resource_graph(query, subscription_ids, tenant_id)
+        while True:
+            try:
+                row = next(rows, None)
+            except Exception as e:
+                logging.warning(f"Resource Graph query failed: {str(e)}")
+                return None
+            if row is None:
+                break
+            
+            # A malformed row (e.g. a snapshot without timeCreated) is skipped, not the whole result
+            try:
+                subscription_id = subscription_lookup.get(row['subscriptionId'].lower(), row['subscriptionId'])
+                resource = row_converter(row, subscription_id)
+            except Exception as e:
+                logging.warning(f"Skipping Resource Graph row {row.get('id', '<unknown>')}: {str(e)}")
+                continue
+            if resource:
+                grouped.setdefault(subscription_id, []).append(resource)
+        
+        return grouped
+    
+    def _graph_row_to_resource(self, row: Dict[str, Any], subscription_id: str,
+                               now_utc: datetime) -> Optional[OrphanResource]:
+        """Convert a Resource Graph row into the same shape the ARM collectors produce"""
+        resource_type = row['type'].lower()
+        resource_id = row['id']
+        
+        if resource_type == 'microsoft.network/publicipaddresses':
+            return OrphanResource(
+                resource_type=RESOURCE_TYPE_PUBLIC_IP,
+                resource_id=resource_id,
+                name=row['name'],
+                location=row['location'],
+                resource_group=_rg(resource_id),
+                subscription_id=subscription_id,
+                sku=row.get('skuName') or 'Basic',
+                allocation_method=row.get('allocationMethod') or None,
+                tags=row.get('tags') or {}
+            )
+        
+        if resource_type == 'microsoft.compute/disks':
+            return OrphanResource(
+                resource_type=RESOURCE_TYPE_MANAGED_DISK,
+                resource_id=resource_id,
+                name=row['name'],
+                location=row['location'],
+                resource_group=_rg(resource_id),
+                subscription_id=subscription_id,
+                disk_size_gb=row.get('diskSizeGB'),
+                sku=row.get('skuName') or 'Unknown',
+                tags=row.get('tags') or {}
+            )
+        
+        if resource_type == 'microsoft.compute/snapshots':
+            time_created = isoparse(row['timeCreated'])
+            age_days = (now_utc - time_created).days
+            return OrphanResource(
+                resource_type=RESOURCE_TYPE_SNAPSHOT,
+                resource_id=resource_id,
+                name=row['name'],
+                location=row['location'],
+                resource_group=_rg(resource_id),
+                subscription_id=subscription_id,
+                disk_size_gb=row.get('diskSizeGB'),
+                age_days=age_days,
+                created_date=time_created.isoformat(),
+                tags=row.get('tags') or {}
+            )
+        
+        if resource_type == 'microsoft.network/networkinterfaces':
+            return OrphanResource(
+                resource_type=RESOURCE_TYPE_NIC,
+                resource_id=resource_id,
+                name=row['name'],
+                location=row['location'],
+                resource_group=_rg(resource_id),
+                subscription_id=subscription_id,
+                tags=row.get('tags') or {}
+            )
+        
+        return None
+    
     def analyze_all(self) -> Dict[str, Any]:
         """Analyze and identify all orphaned resources (single subscription or tenant-wide)"""
         
@@ -400,15 +1052,13 @@ class OrphanedResourceAnalyzer:
             results['analysis_scope'] = 'single_subscription'
             
             # Collect all orphaned resources for the specific subscription
-            all_resources = []
-            all_resources.extend(self.get_orphaned_public_ips())
-            all_resources.extend(self.get_orphaned_disks())
-            all_resources.extend(self.get_orphaned_snapshots())
-            all_resources.extend(self.get_orphaned_nics())
-            all_resources.extend(self.get_vms_without_ahb())
-            all_resources.extend(self.get_advisor_cost_recommendations())
-            
-            results['resources'] = all_resources
+            graph_resources, advisor_recommendations = self._prefetch_bulk_results([self.subscription_id])
+            parts = self._submit_subscription_collectors(
+                self.subscription_id,
+                graph_resources.get(self.subscription_id, []) if graph_resources is not None else None,
+                advisor_recommendations.get(self.subscription_id, []) if advisor_recommendations is not None else None
+            )
+            results['resources'] = self._gather_subscription_resources(parts)
             results['subscriptions_analyzed'] = [self.subscription_id]
             
         else:
@@ -421,41 +1071,47 @@ class OrphanedResourceAnalyzer:
             
             logging.info(f"Starting tenant-wide analysis across {len(subscriptions)} subscriptions")
             
+            graph_resources, advisor_recommendations = self._prefetch_bulk_results_by_tenant(subscriptions)
+            
+            # Queue every subscription's collectors on the shared pool up front, then gather in input order
+            pending = []
             for sub_info in subscriptions:
+                subscription_id = sub_info['subscription_id']
+                logging.info(f"Analyzing subscription: {sub_info['display_name']} ({subscription_id})")
+                try:
+                    parts = self._submit_subscription_collectors(
+                        subscription_id,
+                        graph_resources.get(subscription_id),
+                        advisor_recommendations.get(subscription_id),
+                        sub_info.get('token_tenant_id')
+                    )
+                    pending.append((sub_info, parts))
+                except Exception as e:
+                    logging.error(f"Error analyzing subscription {subscription_id} ({sub_info['display_name']}): {str(e)}")
+            
+            for sub_info, parts in pending:
                 subscription_id = sub_info['subscription_id']
                 subscription_name = sub_info['display_name']
                 
-                logging.info(f"Analyzing subscription: {subscription_name} ({subscription_id})")
-                
                 try:
-                    # Initialize clients for this subscription
-                    if self._initialize_clients_for_subscription(subscription_id):
-                        # Collect orphaned resources for this subscription
-                        sub_resources = []
-                        sub_resources.extend(self.get_orphaned_public_ips(subscription_id))
-                        sub_resources.extend(self.get_orphaned_disks(subscription_id))
-                        sub_resources.extend(self.get_orphaned_snapshots(subscription_id))
-                        sub_resources.extend(self.get_orphaned_nics(subscription_id))
-                        sub_resources.extend(self.get_vms_without_ahb(subscription_id))
-                        sub_resources.extend(self.get_advisor_cost_recommendations(subscription_id))
-                        
-                        # Add subscription display name to each resource
-                        for resource in sub_resources:
-                            resource['subscription_name'] = subscription_name
-                        
-                        all_resources.extend(sub_resources)
-                        successful_subscriptions.append({
-                            'subscription_id': subscription_id,
-                            'subscription_name': subscription_name,
-                            'resources_found': len(sub_resources)
-                        })
-                        
-                        logging.info(f"Found {len(sub_resources)} orphaned resources in {subscription_name}")
-                    else:
-                        logging.warning(f"Failed to initialize clients for subscription {subscription_id}")
-                        
+                    sub_resources = self._gather_subscription_resources(parts)
                 except Exception as e:
                     logging.error(f"Error analyzing subscription {subscription_id} ({subscription_name}): {str(e)}")
+                    continue
+                
+                # Add subscription display name to copies; Advisor results may be shared through the TTL cache
+                sub_resources = [
+                    replace(resource, subscription_name=subscription_name) for resource in sub_resources
+                ]
+                
+                all_resources.extend(sub_resources)
+                successful_subscriptions.append({
+                    'subscription_id': subscription_id,
+                    'subscription_name': subscription_name,
+                    'resources_found': len(sub_resources)
+                })
+                
+                logging.info(f"Found {len(sub_resources)} orphaned resources in {subscription_name}")
             
             results['resources'] = all_resources
             results['subscriptions_analyzed'] = successful_subscriptions
@@ -468,23 +1124,113 @@ class OrphanedResourceAnalyzer:
         
         return results
     
-    def _generate_summary(self, resources: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _prefetch_bulk_results(self, subscription_ids: List[str], tenant_id: Optional[str] = None) -> tuple:
+        """
+        Fetch the bulk (cross-subscription) results concurrently: orphaned resources and Advisor
+        recommendations from Resource Graph, with the ARM batch endpoint as the Advisor fallback
+        All subscriptions must belong to the same tenant (None for the home tenant)
+        Either result is None when the per-subscription collectors have to be used instead
+        """
+        if not subscription_ids:
+            return None, None
+        
+        graph_future = _arm_executor.submit(self.get_orphaned_resources_via_graph, subscription_ids, tenant_id)
+        advisor_future = _arm_executor.submit(self.get_advisor_recommendations_via_graph, subscription_ids, tenant_id)
+        
+        advisor_recommendations = advisor_future.result()
+        if advisor_recommendations is None and len(subscription_ids) > 1:
+            advisor_recommendations = self.get_advisor_recommendations_via_batch(subscription_ids, tenant_id)
+        
+        return graph_future.result(), advisor_recommendations
+    
+    def _prefetch_bulk_results_by_tenant(self, subscriptions: List[Dict[str, str]]) -> tuple:
+        """
+        Run _prefetch_bulk_results once per tenant, since tokens (and so queries) are tenant-specific
+        Returns per-subscription lookups; a subscription maps to None (or is absent) when its
+        collectors have to run per subscription
+        """
+        subscriptions_by_tenant: Dict[Optional[str], List[str]] = defaultdict(list)
+        for sub_info in subscriptions:
+            subscriptions_by_tenant[sub_info.get('token_tenant_id')].append(sub_info['subscription_id'])
+        
+        graph_resources: Dict[str, Optional[List[OrphanResource]]] = {}
+        advisor_recommendations: Dict[str, Optional[List[OrphanResource]]] = {}
+        
+        # Each tenant's prefetch waits on the shared ARM pool, so tenants fan out on a separate pool
+        with ThreadPoolExecutor(max_workers=max(1, min(len(subscriptions_by_tenant), SUBSCRIPTION_CONCURRENCY))) as executor:
+            futures = {
+                executor.submit(self._prefetch_bulk_results, subscription_ids, tenant_id): subscription_ids
+                for tenant_id, subscription_ids in subscriptions_by_tenant.items()
+            }
+            for future, subscription_ids in futures.items():
+                tenant_graph, tenant_advisor = future.result()
+                for subscription_id in subscription_ids:
+                    graph_resources[subscription_id] = (
+                        tenant_graph.get(subscription_id, []) if tenant_graph is not None else None
+                    )
+                    advisor_recommendations[subscription_id] = (tenant_advisor or {}).get(subscription_id)
+        
+        return graph_resources, advisor_recommendations
+    
+    def _submit_subscription_collectors(self, subscription_id: str,
+                                        graph_resources: Optional[List[OrphanResource]] = None,
+                                        advisor_recommendations: Optional[List[OrphanResource]] = None,
+                                        tenant_id: Optional[str] = None) -> List[Any]:
+        """
+        Queue the orphaned resource collectors for one subscription on the shared ARM pool
+        Collectors whose results were already prefetched in bulk are skipped; returns the result
+        parts (prefetched lists and futures) in collector order
+        """
+        # Clients are passed explicitly, so worker threads never overwrite each other's state
+        clients = get_subscription_clients(subscription_id, tenant_id)
+        
+        def submit(collector) -> Future:
+            return _arm_executor.submit(self._run_collector, collector, clients, subscription_id)
+        
+        parts: List[Any] = []
+        if graph_resources is None:
+            parts.extend(submit(collector) for collector in [
+                self.get_orphaned_public_ips,
+                self.get_orphaned_disks,
+                self.get_orphaned_snapshots,
+                self.get_orphaned_nics
+            ])
+        else:
+            parts.append(graph_resources)
+        
+        parts.append(submit(self.get_vms_without_ahb))
+        parts.append(submit(self.get_advisor_cost_recommendations)
+                     if advisor_recommendations is None else advisor_recommendations)
+        return parts
+    
+    def _gather_subscription_resources(self, parts: List[Any]) -> List[OrphanResource]:
+        """Wait for a subscription's collectors and flatten their results in collector order"""
+        resources = []
+        for part in parts:
+            resources.extend(part.result() if isinstance(part, Future) else part)
+        return resources
+    
+    def _run_collector(self, collector, clients: SubClients, subscription_id: str) -> List[OrphanResource]:
+        """Run a collector on a worker of the shared ARM pool"""
+        # Collectors are lazy generators; drain them here so the paged I/O happens on this worker
+        return list(collector(clients, subscription_id))
+    
+    def _generate_summary(self, resources: List[OrphanResource]) -> Dict[str, Any]:
         """Generate summary statistics for orphaned resources"""
-        summary = {
-            'total_resources': len(resources),
-            'by_type': {},
-            'total_potential_savings': 0.0
-        }
+        by_type = Counter(resource.get('resource_type', 'Unknown') for resource in resources)
         
-        for resource in resources:
-            res_type = resource.get('resource_type', 'Unknown')
-            summary['by_type'][res_type] = summary['by_type'].get(res_type, 0) + 1
-            
-            # Only include potential savings from advisor recommendations
-            if res_type == 'Advisor Recommendation':
-                summary['total_potential_savings'] += resource.get('potential_savings', 0.0)
+        # Only include potential savings from advisor recommendations
+        total_potential_savings = sum(
+            resource.get('potential_savings', 0.0)
+            for resource in resources
+            if resource.get('resource_type') == RESOURCE_TYPE_ADVISOR
+        )
         
-        return summary
+        return {
+            'total_resources': len(resources),
+            'by_type': dict(by_type),
+            'total_potential_savings': float(total_potential_savings)
+        }
 
 
 def query_resources(query_params: Dict[str, Any]) -> Dict[str, Any]:
@@ -507,24 +1253,26 @@ def query_resources(query_params: Dict[str, Any]) -> Dict[str, Any]:
     # Get all orphaned resources (single subscription or tenant-wide)
     results = analyzer.analyze_all()
     
-    # Apply filters
-    filtered_resources = results['resources']
-    
-    if query_params.get('resource_types'):
-        resource_types = query_params['resource_types']
-        filtered_resources = [r for r in filtered_resources if r['resource_type'] in resource_types]
+    # Apply all filters in a single pass; unset filters short-circuit on the first check
+    resource_types = query_params.get('resource_types') or ()
+    if isinstance(resource_types, str):
+        # A single type may be passed as a plain string; don't split it into characters
+        resource_types = (resource_types,)
+    types_set = frozenset(resource_types)
+    rg = (query_params.get('resource_group') or '').lower()
+    loc = (query_params.get('location') or '').lower()
+    sub_name = (query_params.get('subscription_name') or '').lower()
     
-    if query_params.get('resource_group'):
-        rg = query_params['resource_group'].lower()
-        filtered_resources = [r for r in filtered_resources if r.get('resource_group', '').lower() == rg]
-    
-    if query_params.get('location'):
-        loc = query_params['location'].lower()
-        filtered_resources = [r for r in filtered_resources if r.get('location', '').lower() == loc]
-    
-    if query_params.get('subscription_name'):
-        sub_name = query_params['subscription_name'].lower()
-        filtered_resources = [r for r in filtered_resources if r.get('subscription_name', '').lower() == sub_name]
+    if types_set or rg or loc or sub_name:
+        filtered_resources = [
+            r for r in results['resources']
+            if (not types_set or r.resource_type in types_set)
+            and (not rg or r.get('resource_group', '').lower() == rg)
+            and (not loc or r.get('location', '').lower() == loc)
+            and (not sub_name or r.get('subscription_name', '').lower() == sub_name)
+        ]
+    else:
+        filtered_resources = results['resources']
     
     results['resources'] = filtered_resources
     results['summary'] = analyzer._generate_summary(filtered_resources)
@@ -532,9 +1280,26 @@ def query_resources(query_params: Dict[str, Any]) -> Dict[str, Any]:
     return results
 
 
+def _orjson_default(obj: Any) -> Any:
+    """orjson fallback for types it does not serialize natively"""
+    if isinstance(obj, OrphanResource):
+        return obj.as_dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _json_response(payload: Any, status_code: int = 200, pretty: bool = False) -> func.HttpResponse:
+    """Serialize a payload with orjson into a JSON HTTP response (indented only when pretty is requested)"""
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | (orjson.OPT_INDENT_2 if pretty else 0)
+    return func.HttpResponse(
+        body=orjson.dumps(payload, default=_orjson_default, option=option),
+        mimetype="application/json",
+        status_code=status_code
+    )
+
+
 @app.function_name(name="OrphanedResourcesAnalyzer")
 @app.route(route="analyze", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
-def analyze_orphaned_resources(req: func.HttpRequest) -> func.HttpResponse:
+async def analyze_orphaned_resources(req: func.HttpRequest) -> func.HttpResponse:
     """
     HTTP trigger function for AI Foundry Agent
     """
@@ -544,28 +1309,36 @@ def analyze_orphaned_resources(req: func.HttpRequest) -> func.HttpResponse:
         req_body = req.get_json()
         logging.info(f"Request body: {json.dumps(req_body)}")
         
-        results = query_resources(req_body)
+        # The analysis is blocking SDK I/O; keep it off the worker's event loop
+        results = await asyncio.to_thread(query_resources, req_body)
         
-        return func.HttpResponse(
-            body=json.dumps(results, indent=2),
-            mimetype="application/json",
-            status_code=200
-        )
+        return _json_response(results, pretty=req.params.get('pretty') == '1')
         
     except ValueError as e:
         logging.error(f"Invalid request: {str(e)}")
-        return func.HttpResponse(
-            body=json.dumps({'error': f'Invalid request: {str(e)}'}),
-            mimetype="application/json",
-            status_code=400
-        )
+        return _json_response({'error': f'Invalid request: {str(e)}'}, status_code=400)
     except Exception as e:
         logging.error(f"Error processing request: {str(e)}")
-        return func.HttpResponse(
-            body=json.dumps({'error': str(e)}),
-            mimetype="application/json",
-            status_code=500
-        )
+        return _json_response({'error': str(e)}, status_code=500)
+
+
+# Static example payloads are serialized once at import time
+_ORPHAN_EXAMPLES_BODY = orjson.dumps({
+    "single_subscription_analysis": {
+        "subscription_id": "your-subscription-id",
+        "resource_types": ["Public IP", "Managed Disk", "Snapshot", "Network Interface"],
+        "resource_group": "my-resource-group",
+        "location": "eastus"
+    },
+    "tenant_wide_analysis": {
+        "resource_types": ["Public IP", "Managed Disk"],
+        "location": "eastus",
+        "subscription_name": "Production Subscription"
+    },
+    "all_resources_all_subscriptions": {
+        "description": "Analyze all resource types across all subscriptions in the tenant"
+    }
+}, option=orjson.OPT_INDENT_2)
 
 
 # Example query for testing
@@ -574,25 +1347,8 @@ def analyze_orphaned_resources(req: func.HttpRequest) -> func.HttpResponse:
 def example_query(req: func.HttpRequest) -> func.HttpResponse:
     """Example endpoint showing orphaned resources query structure"""
     
-    examples = {
-        "single_subscription_analysis": {
-            "subscription_id": "your-subscription-id",
-            "resource_types": ["Public IP", "Managed Disk", "Snapshot", "Network Interface"],
-            "resource_group": "my-resource-group",
-            "location": "eastus"
-        },
-        "tenant_wide_analysis": {
-            "resource_types": ["Public IP", "Managed Disk"],
-            "location": "eastus",
-            "subscription_name": "Production Subscription"
-        },
-        "all_resources_all_subscriptions": {
-            "description": "Analyze all resource types across all subscriptions in the tenant"
-        }
-    }
-    
     return func.HttpResponse(
-        body=json.dumps(examples, indent=2),
+        body=_ORPHAN_EXAMPLES_BODY,
         mimetype="application/json",
         status_code=200
     )
@@ -602,7 +1358,7 @@ def example_query(req: func.HttpRequest) -> func.HttpResponse:
 
 @app.function_name(name="CostAnalysisDirectQuery")
 @app.route(route="cost-analysis", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
-def cost_analysis_direct_query(req: func.HttpRequest) -> func.HttpResponse:
+async def cost_analysis_direct_query(req: func.HttpRequest) -> func.HttpResponse:
     """
     Direct Azure Cost Management and Billing API query function
     Provides detailed cost analysis for resources, resource groups, and subscriptions
@@ -613,28 +1369,198 @@ def cost_analysis_direct_query(req: func.HttpRequest) -> func.HttpResponse:
         req_body = req.get_json()
         logging.info(f"Request body: {json.dumps(req_body)}")
         
-        results = query_cost_management_direct(req_body)
+        # Cost Management queries can take minutes; keep them off the worker's event loop
+        results = await asyncio.to_thread(query_cost_management_direct, req_body)
         
-        return func.HttpResponse(
-            body=json.dumps(results, indent=2),
-            mimetype="application/json",
-            status_code=200
-        )
+        return _json_response(results, pretty=req.params.get('pretty') == '1')
         
     except ValueError as e:
         logging.error(f"Invalid request: {str(e)}")
-        return func.HttpResponse(
-            body=json.dumps({'error': f'Invalid request: {str(e)}'}),
-            mimetype="application/json",
-            status_code=400
-        )
+        return _json_response({'error': f'Invalid request: {str(e)}'}, status_code=400)
     except Exception as e:
         logging.error(f"Error processing request: {str(e)}")
-        return func.HttpResponse(
-            body=json.dumps({'error': str(e)}),
-            mimetype="application/json",
-            status_code=500
-        )
+        return _json_response({'error': str(e)}, status_code=500)
+
+
+# Invariant parts of each Cost Management query; callers patch in timePeriod and per-call dataset fields.
+# These are shared across calls and must never be mutated
+_COST_AGGREGATION = {"totalCost": {"name": "Cost", "function": "Sum"}}
+_COST_SORT_DESCENDING = [{"direction": "Descending", "name": "Cost"}]
+
+_SUBSCRIPTION_COSTS_TEMPLATE = {
+    "type": "ActualCost",
+    "timeframe": "Custom",
+    "dataset": {
+        "aggregation": {
+            **_COST_AGGREGATION,
+            "totalCostUSD": {"name": "CostUSD", "function": "Sum"}
+        },
+        "grouping": [
+            {"type": "Dimension", "name": "ServiceName"},
+            {"type": "Dimension", "name": "ResourceLocation"}
+        ]
+    }
+}
+
+_RESOURCE_GROUP_COSTS_TEMPLATE = {
+    "type": "ActualCost",
+    "timeframe": "Custom",
+    "dataset": {
+        "aggregation": _COST_AGGREGATION,
+        "grouping": [
+            {"type": "Dimension", "name": "ResourceId"},
+            {"type": "Dimension", "name": "ServiceName"}
+        ]
+    }
+}
+
+_SERVICE_COSTS_TEMPLATE = {
+    "type": "ActualCost",
+    "timeframe": "Custom",
+    "dataset": {
+        "granularity": "Daily",
+        "aggregation": _COST_AGGREGATION,
+        "grouping": [
+            {"type": "Dimension", "name": "ResourceId"},
+            {"type": "Dimension", "name": "ServiceName"},
+            {"type": "Dimension", "name": "ResourceLocation"}
+        ]
+    }
+}
+
+_TOP_COST_RESOURCES_TEMPLATE = {
+    "type": "ActualCost",
+    "timeframe": "Custom",
+    "dataset": {
+        "granularity": "None",
+        "aggregation": _COST_AGGREGATION,
+        "grouping": [
+            {"type": "Dimension", "name": "ResourceId"},
+            {"type": "Dimension", "name": "ServiceName"}
+        ],
+        "sorting": _COST_SORT_DESCENDING
+    }
+}
+
+_COST_BY_LOCATION_TEMPLATE = {
+    "type": "ActualCost",
+    "timeframe": "Custom",
+    "dataset": {
+        "granularity": "None",
+        "aggregation": _COST_AGGREGATION,
+        "grouping": [
+            {"type": "Dimension", "name": "ResourceLocation"},
+            {"type": "Dimension", "name": "ServiceName"}
+        ],
+        "sorting": _COST_SORT_DESCENDING
+    }
+}
+
+
+# Static parts of the per-resource QueryDefinition; shared read-only by every resource query
+_RESOURCE_COST_AGGREGATION = {"totalCost": QueryAggregation(name="Cost", function="Sum")}
+_RESOURCE_ID_GROUPING = [QueryGrouping(type="Dimension", name="ResourceId")]
+
+
+def _cost_query_body(template: Dict[str, Any], start_date: datetime, end_date: datetime,
+                     **dataset_fields) -> Dict[str, Any]:
+    """Build a query body from a template, copying only the levels that change per call"""
+    query_body = {
+        **template,
+        "timePeriod": {
+            "from": start_date.isoformat(),
+            "to": end_date.isoformat()
+        }
+    }
+    if dataset_fields:
+        query_body["dataset"] = {**template["dataset"], **dataset_fields}
+    return query_body
+
+
+def _split_range(start_date: datetime, end_date: datetime,
+                 days: int = COST_QUERY_WINDOW_DAYS) -> Iterator[tuple]:
+    """
+    Yield consecutive (start, end) windows covering start_date..end_date
+    Windows break at midnight and end one second before the next begins, so no day is counted twice
+    """
+    window_start = start_date
+    while True:
+        boundary = (window_start + timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        if boundary >= end_date:
+            yield window_start, end_date
+            return
+        yield window_start, boundary - timedelta(seconds=1)
+        window_start = boundary
+
+
+_cost_query_cache = TTLCache(maxsize=128, ttl=COST_QUERY_CACHE_TTL)
+_budget_cache = TTLCache(maxsize=64, ttl=BUDGET_CACHE_TTL)
+_cost_cache_lock = threading.Lock()
+_cost_redis = redis.Redis.from_url(
+    COST_CACHE_REDIS_URL,
+    socket_connect_timeout=COST_CACHE_REDIS_TIMEOUT,
+    socket_timeout=COST_CACHE_REDIS_TIMEOUT
+) if redis and COST_CACHE_REDIS_URL else None
+_cost_redis_retry_at = 0.0
+
+
+def _cost_redis_available() -> bool:
+    """True when Redis is configured and not cooling down after a connection failure"""
+    return _cost_redis is not None and time.monotonic() >= _cost_redis_retry_at
+
+
+def _cost_redis_unavailable(error: Exception):
+    """Stop using Redis for COST_CACHE_REDIS_COOLDOWN seconds after a connection failure"""
+    global _cost_redis_retry_at
+    _cost_redis_retry_at = time.monotonic() + COST_CACHE_REDIS_COOLDOWN
+    logging.warning(f"Cost cache Redis unreachable, skipping it for {COST_CACHE_REDIS_COOLDOWN}s: {str(error)}")
+
+
+def _cost_query_key(scope: str, query_body: Dict[str, Any]) -> str:
+    """Stable cache key for a Cost Management query against a scope"""
+    payload = json.dumps(query_body, sort_keys=True).encode() + scope.encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Context-manager semaphore whose limit drops to min_limit when rate limited
+    and returns to max_limit after recover_after consecutive successes
+    """
+    
+    def __init__(self, max_limit: int, min_limit: int, recover_after: int = 10):
+        self._max_limit = max_limit
+        self._min_limit = min_limit
+        self._recover_after = recover_after
+        self._limit = max_limit
+        self._active = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+    
+    def __enter__(self):
+        with self._condition:
+            while self._active >= self._limit:
+                self._condition.wait()
+            self._active += 1
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+    
+    def record_success(self):
+        with self._condition:
+            self._successes += 1
+            if self._limit < self._max_limit and self._successes >= self._recover_after:
+                self._limit = self._max_limit
+                self._successes = 0
+                self._condition.notify_all()
+    
+    def record_rate_limit(self):
+        with self._condition:
+            self._limit = self._min_limit
+            self._successes = 0
 
 
 class CostManagementAnalyzer:
@@ -645,7 +1571,7 @@ class CostManagementAnalyzer:
         self.credential = credential
         
         # Initialize Cost Management Client with custom headers to avoid 429 rate limiting
-        self.cost_client = CostManagementClient(credential)
+        self.cost_client = CostManagementClient(credential, transport=_shared_transport())
         
         # Add custom ClientType header to bypass rate limiting (as per Microsoft documentation)
         # https://learn.microsoft.com/en-us/answers/questions/1340993/exception-429-too-many-requests-for-azure-cost-man
@@ -656,7 +1582,8 @@ class CostManagementAnalyzer:
             self.cost_client._client._config.headers = custom_headers
             logging.info("Added ClientType header to Cost Management client to avoid rate limiting")
         
-        self.resource_client = ResourceManagementClient(credential, subscription_id)
+        self.resource_client = ResourceManagementClient(credential, subscription_id, transport=_shared_transport())
+        self.max_parallel = COST_MAX_PARALLEL
     
     def get_subscription_costs(self, start_date: datetime, end_date: datetime, 
                              granularity: str = "Daily") -> Dict[str, Any]:
@@ -664,39 +1591,10 @@ class CostManagementAnalyzer:
         try:
             scope = f"/subscriptions/{self.subscription_id}"
             
-            query_body = {
-                "type": "ActualCost",
-                "timeframe": "Custom",
-                "timePeriod": {
-                    "from": start_date.isoformat(),
-                    "to": end_date.isoformat()
-                },
-                "dataset": {
-                    "granularity": granularity,
-                    "aggregation": {
-                        "totalCost": {
-                            "name": "Cost",
-                            "function": "Sum"
-                        },
-                        "totalCostUSD": {
-                            "name": "CostUSD", 
-                            "function": "Sum"
-                        }
-                    },
-                    "grouping": [
-                        {
-                            "type": "Dimension",
-                            "name": "ServiceName"
-                        },
-                        {
-                            "type": "Dimension", 
-                            "name": "ResourceLocation"
-                        }
-                    ]
-                }
-            }
+            query_body = _cost_query_body(_SUBSCRIPTION_COSTS_TEMPLATE, start_date, end_date,
+                                          granularity=granularity)
             
-            result = self.cost_client.query.usage(scope, query_body)
+            result = self._query_usage_windowed(scope, query_body, start_date, end_date)
             
             return self._process_cost_result(result, "subscription")
             
@@ -710,35 +1608,10 @@ class CostManagementAnalyzer:
         try:
             scope = f"/subscriptions/{self.subscription_id}/resourceGroups/{resource_group}"
             
-            query_body = {
-                "type": "ActualCost",
-                "timeframe": "Custom", 
-                "timePeriod": {
-                    "from": start_date.isoformat(),
-                    "to": end_date.isoformat()
-                },
-                "dataset": {
-                    "granularity": granularity,
-                    "aggregation": {
-                        "totalCost": {
-                            "name": "Cost",
-                            "function": "Sum"
-                        }
-                    },
-                    "grouping": [
-                        {
-                            "type": "Dimension",
-                            "name": "ResourceId"
-                        },
-                        {
-                            "type": "Dimension",
-                            "name": "ServiceName"
-                        }
-                    ]
-                }
-            }
+            query_body = _cost_query_body(_RESOURCE_GROUP_COSTS_TEMPLATE, start_date, end_date,
+                                          granularity=granularity)
             
-            result = self.cost_client.query.usage(scope, query_body)
+            result = self._query_usage_cached(scope, query_body)
             
             return self._process_cost_result(result, "resource_group", resource_group)
             
@@ -752,46 +1625,15 @@ class CostManagementAnalyzer:
         try:
             scope = f"/subscriptions/{self.subscription_id}"
             
-            query_body = {
-                "type": "ActualCost",
-                "timeframe": "Custom",
-                "timePeriod": {
-                    "from": start_date.isoformat(),
-                    "to": end_date.isoformat()
-                },
-                "dataset": {
-                    "granularity": "Daily",
-                    "aggregation": {
-                        "totalCost": {
-                            "name": "Cost",
-                            "function": "Sum"
-                        }
-                    },
-                    "filter": {
-                        "dimensions": {
-                            "name": "ServiceName",
-                            "operator": "In",
-                            "values": service_names
-                        }
-                    },
-                    "grouping": [
-                        {
-                            "type": "Dimension",
-                            "name": "ResourceId"
-                        },
-                        {
-                            "type": "Dimension",
-                            "name": "ServiceName"
-                        },
-                        {
-                            "type": "Dimension",
-                            "name": "ResourceLocation"
-                        }
-                    ]
+            query_body = _cost_query_body(_SERVICE_COSTS_TEMPLATE, start_date, end_date, filter={
+                "dimensions": {
+                    "name": "ServiceName",
+                    "operator": "In",
+                    "values": service_names
                 }
-            }
+            })
             
-            result = self.cost_client.query.usage(scope, query_body)
+            result = self._query_usage_windowed(scope, query_body, start_date, end_date)
             
             return self._process_cost_result(result, "service_filter", service_names)
             
@@ -805,42 +1647,10 @@ class CostManagementAnalyzer:
         try:
             scope = f"/subscriptions/{self.subscription_id}"
             
-            query_body = {
-                "type": "ActualCost",
-                "timeframe": "Custom",
-                "timePeriod": {
-                    "from": start_date.isoformat(),
-                    "to": end_date.isoformat()
-                },
-                "dataset": {
-                    "granularity": "None",
-                    "aggregation": {
-                        "totalCost": {
-                            "name": "Cost",
-                            "function": "Sum"
-                        }
-                    },
-                    "grouping": [
-                        {
-                            "type": "Dimension",
-                            "name": "ResourceId"
-                        },
-                        {
-                            "type": "Dimension",
-                            "name": "ServiceName"
-                        }
-                    ],
-                    "sorting": [
-                        {
-                            "direction": "Descending",
-                            "name": "Cost"
-                        }
-                    ]
-                },
-                "top": top_n
-            }
+            query_body = _cost_query_body(_TOP_COST_RESOURCES_TEMPLATE, start_date, end_date)
+            query_body["top"] = top_n
             
-            result = self.cost_client.query.usage(scope, query_body)
+            result = self._query_usage_cached(scope, query_body)
             
             return self._process_cost_result(result, "top_resources", top_n)
             
@@ -851,24 +1661,20 @@ class CostManagementAnalyzer:
     def get_budget_analysis(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
         """Get budget vs actual spending analysis"""
         try:
+            scope = f"/subscriptions/{self.subscription_id}"
+            
+            # Actual costs and budgets are independent round trips, so fetch them concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                costs_future = executor.submit(self.get_subscription_costs, start_date, end_date, "Monthly")
+                budgets_future = executor.submit(self._list_budgets_cached, scope)
+            
             # Get actual costs
-            actual_costs = self.get_subscription_costs(start_date, end_date, "Monthly")
+            actual_costs = costs_future.result()
             
             # Get budgets (if any are configured)
             budgets = []
             try:
-                scope = f"/subscriptions/{self.subscription_id}"
-                budget_list = list(self.cost_client.budgets.list(scope))
-                
-                for budget in budget_list:
-                    budgets.append({
-                        "name": budget.name,
-                        "amount": budget.amount,
-                        "current_spend": budget.current_spend.amount if budget.current_spend else 0,
-                        "forecasted_spend": budget.forecasted_spend.amount if budget.forecasted_spend else 0,
-                        "time_grain": budget.time_grain,
-                        "category": budget.category
-                    })
+                budgets = budgets_future.result()
             except Exception as e:
                 logging.warning(f"Could not fetch budgets: {str(e)}")
             
@@ -892,41 +1698,9 @@ class CostManagementAnalyzer:
         try:
             scope = f"/subscriptions/{self.subscription_id}"
             
-            query_body = {
-                "type": "ActualCost",
-                "timeframe": "Custom",
-                "timePeriod": {
-                    "from": start_date.isoformat(),
-                    "to": end_date.isoformat()
-                },
-                "dataset": {
-                    "granularity": "None",
-                    "aggregation": {
-                        "totalCost": {
-                            "name": "Cost",
-                            "function": "Sum"
-                        }
-                    },
-                    "grouping": [
-                        {
-                            "type": "Dimension",
-                            "name": "ResourceLocation"
-                        },
-                        {
-                            "type": "Dimension",
-                            "name": "ServiceName"
-                        }
-                    ],
-                    "sorting": [
-                        {
-                            "direction": "Descending",
-                            "name": "Cost"
-                        }
-                    ]
-                }
-            }
+            query_body = _cost_query_body(_COST_BY_LOCATION_TEMPLATE, start_date, end_date)
             
-            result = self.cost_client.query.usage(scope, query_body)
+            result = self._query_usage_windowed(scope, query_body, start_date, end_date)
             
             return self._process_cost_result(result, "by_location")
             
@@ -934,6 +1708,122 @@ class CostManagementAnalyzer:
             logging.error(f"Error fetching costs by location: {str(e)}")
             return {"error": str(e)}
     
+    def _query_usage_cached(self, scope: str, query_body: Dict[str, Any]):
+        """
+        Run a Cost Management usage query, reusing results for identical (scope, query_body) pairs
+        Checks the in-process cache first, then Redis (if configured), then calls the API
+        """
+        key = _cost_query_key(scope, query_body)
+        with _cost_cache_lock:
+            cached = _cost_query_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        redis_key = f"azcost:{key}"
+        if _cost_redis_available():
+            try:
+                payload = _cost_redis.get(redis_key)
+                if payload:
+                    result = QueryResult.from_dict(json.loads(payload))
+                    with _cost_cache_lock:
+                        _cost_query_cache[key] = result
+                    return result
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                _cost_redis_unavailable(e)
+            except Exception as e:
+                logging.warning(f"Cost cache read from Redis failed: {str(e)}")
+        
+        result = self.cost_client.query.usage(scope, query_body)
+        
+        with _cost_cache_lock:
+            _cost_query_cache[key] = result
+        if _cost_redis_available():
+            try:
+                _cost_redis.setex(redis_key, COST_QUERY_CACHE_TTL, json.dumps(result.as_dict(), default=str))
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                _cost_redis_unavailable(e)
+            except Exception as e:
+                logging.warning(f"Cost cache write to Redis failed: {str(e)}")
+        
+        return result
+    
+    def _query_usage_windowed(self, scope: str, query_body: Dict[str, Any],
+                              start_date: datetime, end_date: datetime):
+        """
+        Run a usage query, splitting ranges over COST_QUERY_WINDOW_DAYS into parallel window queries
+        Window rows sharing the same dimension values (e.g. a service in a Monthly or None granularity
+        query) are merged by summing their aggregation columns, then re-sorted if the query sorts
+        """
+        if (end_date - start_date).days <= COST_QUERY_WINDOW_DAYS:
+            return self._query_usage_cached(scope, query_body)
+        
+        windows = list(_split_range(start_date, end_date))
+        logging.info(f"Splitting cost query into {len(windows)} windows of up to {COST_QUERY_WINDOW_DAYS} days")
+        
+        with ThreadPoolExecutor(max_workers=min(len(windows), self.max_parallel)) as executor:
+            futures = [
+                executor.submit(self._query_usage_cached, scope, {
+                    **query_body,
+                    "timePeriod": {
+                        "from": window_start.isoformat(),
+                        "to": window_end.isoformat()
+                    }
+                })
+                for window_start, window_end in windows
+            ]
+            window_results = [future.result() for future in futures]
+        
+        columns = next((result.columns for result in window_results if result.columns), None) or []
+        column_names = [col.name for col in columns]
+        
+        dataset = query_body["dataset"]
+        aggregation_names = {aggregation["name"] for aggregation in dataset["aggregation"].values()}
+        sum_indexes = [i for i, name in enumerate(column_names) if name in aggregation_names]
+        key_indexes = [i for i, name in enumerate(column_names) if name not in aggregation_names]
+        
+        # Rows merge on their dimension columns, keeping first-seen order
+        merged: Dict[tuple, list] = {}
+        for result in window_results:
+            for row in result.rows or []:
+                key = tuple(row[i] for i in key_indexes)
+                existing = merged.get(key)
+                if existing is None:
+                    merged[key] = list(row)
+                else:
+                    for i in sum_indexes:
+                        existing[i] = (existing[i] or 0) + (row[i] or 0)
+        
+        rows = list(merged.values())
+        for sort in reversed(dataset.get("sorting", [])):
+            if sort["name"] in column_names:
+                index = column_names.index(sort["name"])
+                rows.sort(key=lambda row: row[index] or 0, reverse=sort["direction"] == "Descending")
+        
+        return QueryResult(columns=columns, rows=rows)
+    
+    def _list_budgets_cached(self, scope: str) -> List[Dict[str, Any]]:
+        """List the budgets configured on a scope, cached for BUDGET_CACHE_TTL seconds"""
+        with _cost_cache_lock:
+            cached = _budget_cache.get(scope)
+        if cached is not None:
+            return list(cached)
+        
+        # Consume the pager page by page rather than materializing the SDK models first
+        budgets = []
+        for budget in self.cost_client.budgets.list(scope):
+            budgets.append({
+                "name": budget.name,
+                "amount": budget.amount,
+                "current_spend": budget.current_spend.amount if budget.current_spend else 0,
+                "forecasted_spend": budget.forecasted_spend.amount if budget.forecasted_spend else 0,
+                "time_grain": budget.time_grain,
+                "category": budget.category
+            })
+        
+        with _cost_cache_lock:
+            _budget_cache[scope] = budgets
+        return list(budgets)
+    
     def _process_cost_result(self, result, analysis_type: str, metadata: Any = None) -> Dict[str, Any]:
         """Process cost query results into structured format"""
         processed_result = {
@@ -950,27 +1840,20 @@ class CostManagementAnalyzer:
             processed_result["columns"] = [col.name for col in result.columns]
         
         if hasattr(result, 'rows') and result.rows:
-            total_cost = 0.0
+            rows = [row for row in result.rows if row]
+            # First column is usually the cost
+            costs = [float(row[0]) if row[0] else 0.0 for row in rows]
             
-            for row in result.rows:
-                if row and len(row) > 0:
-                    # First column is usually the cost
-                    cost = float(row[0]) if row[0] else 0.0
-                    total_cost += cost
-                    
-                    processed_row = {
-                        "cost": cost,
-                        "data": row[1:] if len(row) > 1 else []
-                    }
-                    processed_result["rows"].append(processed_row)
-            
-            processed_result["total_cost"] = total_cost
+            processed_result["rows"] = [
+                {"cost": cost, "data": row[1:]} for cost, row in zip(costs, rows)
+            ]
+            processed_result["total_cost"] = sum(costs)
         
         return processed_result
     
     def get_specific_resources_cost(self, resource_ids: List[str], start_date: datetime,
                                   end_date: datetime) -> Dict[str, Any]:
-        """Get costs for specific resource IDs using individual queries with rate limiting"""
+        """Get costs for specific resource IDs using batched ResourceId queries"""
         results = {
             "subscription_id": self.subscription_id,
             "period": {
@@ -981,142 +1864,324 @@ class CostManagementAnalyzer:
             "total_cost": 0.0
         }
         
-        logging.info(f"Querying costs for {len(resource_ids)} resources individually to ensure accuracy")
+        logging.info(f"Querying costs for {len(resource_ids)} resources in batched ResourceId queries")
         
-        return self._get_individual_resource_costs(resource_ids, start_date, end_date, results)
+        return self._get_batched_resource_costs(resource_ids, start_date, end_date, results)
+    
+    def _get_batched_resource_costs(self, resource_ids: List[str], start_date: datetime,
+                                    end_date: datetime, results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Primary method: one Cost Management query per chunk of resources, grouped by ResourceId
+        Throttled chunks are retried with backoff; only chunks whose filter is rejected (HTTP 400), whose
+        result lacks the ResourceId column or doesn't fit in one page go through the individual-query fallback
+        """
+        scope = f"/subscriptions/{self.subscription_id}"
+        time_period = QueryTimePeriod(from_property=start_date, to=end_date)
+        
+        # Daily rows per resource x resources must fit in a single result page
+        days = max((end_date - start_date).days + 1, 1)
+        chunk_size = max(1, min(SPECIFIC_RESOURCES_CHUNK_SIZE, COST_QUERY_PAGE_ROWS // days))
+        failed_resource_ids = []
+        
+        for start in range(0, len(resource_ids), chunk_size):
+            chunk = resource_ids[start:start + chunk_size]
+            
+            query_definition = QueryDefinition(
+                type="ActualCost",
+                timeframe="Custom",
+                time_period=time_period,
+                dataset=QueryDataset(
+                    granularity="Daily",
+                    aggregation=_RESOURCE_COST_AGGREGATION,
+                    grouping=_RESOURCE_ID_GROUPING,
+                    filter=QueryFilter(
+                        dimensions=QueryComparisonExpression(
+                            name="ResourceId",
+                            operator="In",
+                            values=chunk
+                        )
+                    )
+                )
+            )
+            
+            try:
+                result = self._query_resource_chunk(scope, query_definition)
+            except HttpResponseError as e:
+                if e.status_code == 400:
+                    logging.warning(f"Batched cost query rejected for {len(chunk)} resources: {str(e)}")
+                    failed_resource_ids.extend(chunk)
+                else:
+                    logging.error(f"Batched cost query failed for {len(chunk)} resources: {str(e)}")
+                    results["resources"].extend({"resource_id": resource_id, "error": str(e)} for resource_id in chunk)
+                continue
+            except Exception as e:
+                logging.error(f"Batched cost query failed for {len(chunk)} resources: {str(e)}")
+                results["resources"].extend({"resource_id": resource_id, "error": str(e)} for resource_id in chunk)
+                continue
+            
+            if getattr(result, 'next_link', None):
+                logging.warning(f"Batched cost query for {len(chunk)} resources spans multiple pages")
+                failed_resource_ids.extend(chunk)
+                continue
+            
+            # Locate columns by name; Cost Management returns resource IDs in lowercase
+            columns = [col.name.lower() for col in (result.columns or [])]
+            if 'resourceid' not in columns:
+                logging.warning(f"Batched cost query for {len(chunk)} resources returned no ResourceId column")
+                failed_resource_ids.extend(chunk)
+                continue
+            cost_index = columns.index('cost') if 'cost' in columns else 0
+            date_index = columns.index('usagedate') if 'usagedate' in columns else 1
+            resource_index = columns.index('resourceid')
+            
+            daily_costs_by_resource = defaultdict(list)
+            for row in result.rows or []:
+                if not row:
+                    continue
+                cost = float(row[cost_index]) if row[cost_index] else 0.0
+                date_value = row[date_index]
+                daily_costs_by_resource[str(row[resource_index]).lower()].append({
+                    "date": str(date_value) if date_value else "",
+                    "cost": cost
+                })
+            
+            for resource_id in chunk:
+                daily_costs = daily_costs_by_resource.get(resource_id.lower(), [])
+                resource_cost = sum(day["cost"] for day in daily_costs)
+                
+                results["resources"].append({
+                    "resource_id": resource_id,
+                    "total_cost": resource_cost,
+                    "daily_costs": daily_costs
+                })
+                results["total_cost"] += resource_cost
+        
+        if failed_resource_ids:
+            return self._get_individual_resource_costs(failed_resource_ids, start_date, end_date, results)
+        
+        return results
+    
+    @retry_with_backoff(max_retries=4, base_delay=5.0, max_delay=120.0)
+    def _query_resource_chunk(self, scope: str, query_definition: QueryDefinition):
+        """Run one batched ResourceId query, backing off (per Retry-After when given) on 429/5xx"""
+        return self.cost_client.query.usage(scope, query_definition)
     
     def _get_individual_resource_costs(self, resource_ids: List[str], start_date: datetime,
                                      end_date: datetime, results: Dict[str, Any]) -> Dict[str, Any]:
-        """Primary method: Query each resource individually with aggressive rate limiting and retry logic"""
+        """Fallback method: Query each resource individually in parallel with adaptive rate limiting and retry logic"""
         logging.warning("Falling back to individual resource queries due to batch query failure")
         
-        import time
+        scope = f"/subscriptions/{self.subscription_id}"
+        time_period = QueryTimePeriod(from_property=start_date, to=end_date)
         
-        # Split large resource lists into smaller batches to reduce rate limiting
-        batch_size = 3  # Process max 3 resources at a time
-        if len(resource_ids) > batch_size:
-            logging.info(f"Processing {len(resource_ids)} resources in batches of {batch_size} to avoid rate limits")
+        # Parallelism drops to 2 on a 429 and recovers after a run of successes
+        limiter = AdaptiveConcurrencyLimiter(self.max_parallel, min(2, self.max_parallel))
         
-        # Circuit breaker for consecutive rate limit failures
+        # Circuit breaker for consecutive rate limit failures, shared by all workers
+        circuit_open = threading.Event()
+        state_lock = threading.Lock()
         consecutive_rate_limits = 0
         max_consecutive_rate_limits = 3
         
-        for i, resource_id in enumerate(resource_ids):
-            # Add modest delay with ClientType header fix - much reduced delays
-            if i > 0:
-                # Modest rate limiting with ClientType header: 2s base + 0.5s per resource, max 10s
-                delay = min(2.0 + (i * 0.5), 10.0)  
-                logging.info(f"Rate limiting delay: {delay:.1f}s before querying resource {i+1}/{len(resource_ids)}")
-                time.sleep(delay)
+        # Retry logic for each individual resource with extended retries for 429
+        max_retries = 5
+        
+        def _query_one(index: int, resource_id: str) -> Dict[str, Any]:
+            nonlocal consecutive_rate_limits
             
-            # Retry logic for each individual resource with extended retries for 429
-            max_retries = 5  # Increased from 3 to 5
-            for attempt in range(max_retries):
-                try:
-                    scope = f"/subscriptions/{self.subscription_id}"
-                    
-                    # Use the same QueryDefinition format that works in our tests
-                    from azure.mgmt.costmanagement.models import (
-                        QueryDefinition, QueryTimePeriod, QueryDataset, 
-                        QueryAggregation, QueryFilter, QueryComparisonExpression
-                    )
-                    
-                    query_definition = QueryDefinition(
-                        type="ActualCost",
-                        timeframe="Custom",
-                        time_period=QueryTimePeriod(
-                            from_property=start_date,
-                            to=end_date
-                        ),
-                        dataset=QueryDataset(
-                            granularity="Daily",
-                            aggregation={
-                                "totalCost": QueryAggregation(name="Cost", function="Sum")
-                            },
-                            filter=QueryFilter(
-                                dimensions=QueryComparisonExpression(
-                                    name="ResourceId",
-                                    operator="In",
-                                    values=[resource_id]
-                                )
-                            )
+            # Use the same QueryDefinition format that works in our tests
+            query_definition = QueryDefinition(
+                type="ActualCost",
+                timeframe="Custom",
+                time_period=time_period,
+                dataset=QueryDataset(
+                    granularity="Daily",
+                    aggregation=_RESOURCE_COST_AGGREGATION,
+                    filter=QueryFilter(
+                        dimensions=QueryComparisonExpression(
+                            name="ResourceId",
+                            operator="In",
+                            values=[resource_id]
                         )
                     )
-                    
-                    result = self.cost_client.query.usage(scope, query_definition)
-                    
-                    resource_cost = 0.0
-                    daily_costs = []
-                    
-                    if hasattr(result, 'rows') and result.rows:
-                        for row in result.rows:
-                            if row and len(row) > 0:
-                                cost = float(row[0]) if row[0] else 0.0
-                                resource_cost += cost
-                                # Parse date from the second column
-                                date_value = row[1] if len(row) > 1 else ""
-                                date_str = str(date_value) if date_value else ""
-                                daily_costs.append({
-                                    "date": date_str,
-                                    "cost": cost
-                                })
-                    
-                    results["resources"].append({
+                )
+            )
+            
+            for attempt in range(max_retries):
+                if circuit_open.is_set():
+                    return {
                         "resource_id": resource_id,
-                        "total_cost": resource_cost,
-                        "daily_costs": daily_costs
-                    })
-                    
-                    results["total_cost"] += resource_cost
-                    
-                    resource_name = resource_id.split('/')[-1] if '/' in resource_id else resource_id
-                    if resource_cost > 0:
-                        logging.info(f"✅ Resource {i+1}/{len(resource_ids)} ({resource_name}): ${resource_cost:.2f}")
-                    else:
-                        logging.info(f"⚪ Resource {i+1}/{len(resource_ids)} ({resource_name}): $0.00")
-                    
-                    # Reset consecutive rate limit counter on success
-                    consecutive_rate_limits = 0
-                    break  # Success, exit retry loop
+                        "error": CIRCUIT_BREAKER_SKIPPED_ERROR
+                    }
+                
+                try:
+                    with limiter:
+                        result = self.cost_client.query.usage(scope, query_definition)
                     
                 except Exception as e:
-                    if attempt < max_retries - 1:
-                        # Special handling for 429 rate limit errors
-                        if "429" in str(e) or "Too many requests" in str(e):
+                    # Special handling for 429 rate limit errors
+                    if _is_rate_limited(e):
+                        limiter.record_rate_limit()
+                        with state_lock:
                             consecutive_rate_limits += 1
-                            # Much longer delays for rate limit errors
-                            retry_delay = min(15.0 * (2 ** attempt), 120.0)  # 15s, 30s, 60s, 120s
-                            logging.warning(f"Rate limit hit for {resource_id} (attempt {attempt + 1}/{max_retries}). Waiting {retry_delay:.1f}s before retry...")
-                            
                             # Circuit breaker: if too many consecutive rate limits, give up early
-                            if consecutive_rate_limits >= max_consecutive_rate_limits:
-                                logging.error(f"Circuit breaker activated: {consecutive_rate_limits} consecutive rate limits. Skipping remaining resources to avoid further API throttling.")
-                                # Add remaining resources as failed
-                                for remaining_resource in resource_ids[i:]:
-                                    results["resources"].append({
-                                        "resource_id": remaining_resource,
-                                        "error": "Skipped due to rate limiting circuit breaker"
-                                    })
-                                return results
-                        else:
-                            # Standard exponential backoff for other errors
-                            retry_delay = min(5.0 * (2 ** attempt), 30.0)
-                            logging.warning(f"Attempt {attempt + 1} failed for {resource_id}: {str(e)}. Retrying in {retry_delay:.1f}s")
+                            if consecutive_rate_limits >= max_consecutive_rate_limits and not circuit_open.is_set():
+                                logger.error("Circuit breaker activated: %d consecutive rate limits. Skipping remaining resources to avoid further API throttling.", consecutive_rate_limits)
+                                circuit_open.set()
+                        if circuit_open.is_set():
+                            continue
                         
-                        time.sleep(retry_delay)
+                        # Honor the server's Retry-After, otherwise use much longer delays for rate limit errors
+                        # A zero or past Retry-After is treated as absent so the worker never re-fires immediately
+                        retry_after = _retry_after_seconds(e) if isinstance(e, HttpResponseError) else None
+                        if retry_after:
+                            retry_delay = min(retry_after, 120.0)
+                        else:
+                            retry_delay = min(15.0 * (2 ** attempt), 120.0)  # 15s, 30s, 60s, 120s
+                        logger.warning("Rate limit hit for %s (attempt %d/%d). Waiting %.1fs before retry...", resource_id, attempt + 1, max_retries, retry_delay)
                     else:
-                        # All retries failed
-                        if "429" in str(e) or "Too many requests" in str(e):
-                            consecutive_rate_limits += 1
-                        
-                        logging.error(f"All {max_retries} attempts failed for resource {resource_id}: {str(e)}")
-                        results["resources"].append({
-                            "resource_id": resource_id,
-                            "error": str(e)
-                        })
+                        # Standard exponential backoff for other errors
+                        retry_delay = min(5.0 * (2 ** attempt), 30.0)
+                        logger.warning("Attempt %d failed for %s: %s. Retrying in %.1fs", attempt + 1, resource_id, e, retry_delay)
+                    
+                    if attempt < max_retries - 1:
+                        time.sleep(retry_delay)
+                        continue
+                    
+                    # All retries failed
+                    logger.error("All %d attempts failed for resource %s: %s", max_retries, resource_id, e)
+                    return {
+                        "resource_id": resource_id,
+                        "error": str(e)
+                    }
+                
+                resource_cost = 0.0
+                daily_costs = []
+                
+                if hasattr(result, 'rows') and result.rows:
+                    for row in result.rows:
+                        if row and len(row) > 0:
+                            cost = float(row[0]) if row[0] else 0.0
+                            resource_cost += cost
+                            # Parse date from the second column
+                            date_value = row[1] if len(row) > 1 else ""
+                            date_str = str(date_value) if date_value else ""
+                            daily_costs.append({
+                                "date": date_str,
+                                "cost": cost
+                            })
+                
+                # Reset consecutive rate limit counter on success
+                with state_lock:
+                    consecutive_rate_limits = 0
+                limiter.record_success()
+                
+                # Per-resource progress is skipped entirely when INFO is disabled (e.g. production at WARNING)
+                if logger.isEnabledFor(logging.INFO):
+                    resource_name = resource_id.rsplit('/', 1)[-1]
+                    logger.info("%s Resource %d/%d (%s): $%.2f", "✅" if resource_cost > 0 else "⚪",
+                                index + 1, len(resource_ids), resource_name, resource_cost)
+                
+                return {
+                    "resource_id": resource_id,
+                    "total_cost": resource_cost,
+                    "daily_costs": daily_costs
+                }
+            
+            return {
+                "resource_id": resource_id,
+                "error": CIRCUIT_BREAKER_SKIPPED_ERROR
+            }
+        
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            futures = [
+                executor.submit(_query_one, index, resource_id)
+                for index, resource_id in enumerate(resource_ids)
+            ]
+            for _ in as_completed(futures):
+                if circuit_open.is_set():
+                    # Queued resources never start once the breaker trips; in-flight ones finish on their own
+                    for future in futures:
+                        future.cancel()
+                    break
+        
+        # Report resources in request order regardless of completion order
+        resource_results = [
+            {"resource_id": resource_id, "error": CIRCUIT_BREAKER_SKIPPED_ERROR}
+            if future.cancelled() else future.result()
+            for resource_id, future in zip(resource_ids, futures)
+        ]
+        results["resources"].extend(resource_results)
+        results["total_cost"] += sum(resource_result.get("total_cost", 0.0) for resource_result in resource_results)
         
         return results
 
+def _query_subscription_costs(analyzer: CostManagementAnalyzer, query_params: Dict[str, Any],
+                              start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Subscription-wide costs at the requested granularity"""
+    granularity = query_params.get('granularity', 'Daily')
+    return analyzer.get_subscription_costs(start_date, end_date, granularity)
+
+
+def _query_resource_group_costs(analyzer: CostManagementAnalyzer, query_params: Dict[str, Any],
+                                start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Costs for one resource group (requires resource_group)"""
+    resource_group = query_params.get('resource_group')
+    if not resource_group:
+        return {'error': 'resource_group is required for resource_group query'}
+    granularity = query_params.get('granularity', 'Daily')
+    return analyzer.get_resource_group_costs(resource_group, start_date, end_date, granularity)
+
+
+def _query_service_costs(analyzer: CostManagementAnalyzer, query_params: Dict[str, Any],
+                         start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Costs filtered to service names (requires service_names)"""
+    service_names = query_params.get('service_names')
+    if not service_names:
+        return {'error': 'service_names list is required for service query'}
+    return analyzer.get_resource_costs_by_service(service_names, start_date, end_date)
+
+
+def _query_top_resources(analyzer: CostManagementAnalyzer, query_params: Dict[str, Any],
+                         start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Top N most expensive resources (top_n, default 10)"""
+    top_n = query_params.get('top_n', 10)
+    return analyzer.get_top_cost_resources(start_date, end_date, top_n)
+
+
+def _query_budget(analyzer: CostManagementAnalyzer, query_params: Dict[str, Any],
+                  start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Budgets alongside monthly actual costs"""
+    return analyzer.get_budget_analysis(start_date, end_date)
+
+
+def _query_location_costs(analyzer: CostManagementAnalyzer, query_params: Dict[str, Any],
+                          start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Costs broken down by Azure region"""
+    return analyzer.get_cost_by_location(start_date, end_date)
+
+
+def _query_specific_resources(analyzer: CostManagementAnalyzer, query_params: Dict[str, Any],
+                              start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Costs for specific resource IDs (requires resource_ids)"""
+    resource_ids = query_params.get('resource_ids')
+    if not resource_ids:
+        return {'error': 'resource_ids list is required for specific_resources query'}
+    logging.info(f"Executing specific_resources cost query for {len(resource_ids)} resources")
+    return analyzer.get_specific_resources_cost(resource_ids, start_date, end_date)
+
+
+# query_type -> handler; each handler validates the parameters its query needs
+_COST_QUERY_HANDLERS = {
+    'subscription': _query_subscription_costs,
+    'resource_group': _query_resource_group_costs,
+    'service': _query_service_costs,
+    'top_resources': _query_top_resources,
+    'budget': _query_budget,
+    'location': _query_location_costs,
+    'specific_resources': _query_specific_resources,
+}
+
 
 def query_cost_management_direct(query_params: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -1156,21 +2221,24 @@ def query_cost_management_direct(query_params: Dict[str, Any]) -> Dict[str, Any]
     try:
         # Check if dates are provided
         if 'start_date' in query_params and 'end_date' in query_params:
-            start_date_str = query_params['start_date']
             end_date_str = query_params['end_date']
             
-            # Handle different date formats
-            if 'T' not in start_date_str:
-                # Format: YYYY-MM-DD -> add time component
-                start_date = datetime.fromisoformat(start_date_str + 'T00:00:00')
-                end_date = datetime.fromisoformat(end_date_str + 'T23:59:59')
-            else:
-                # Format: YYYY-MM-DDTHH:MM:SS[Z]
-                start_date = datetime.fromisoformat(start_date_str.replace('Z', '+00:00'))
-                end_date = datetime.fromisoformat(end_date_str.replace('Z', '+00:00'))
+            # isoparse accepts YYYY-MM-DD and YYYY-MM-DDTHH:MM:SS[Z] alike; a bare date parses as midnight
+            start_date = isoparse(query_params['start_date'])
+            end_date = isoparse(end_date_str)
+            
+            # A bare end date covers the whole day
+            if 'T' not in end_date_str:
+                end_date = end_date.replace(hour=23, minute=59, second=59)
+            
+            # Mixed inputs (e.g. a ...Z start with a bare end date) can't be compared; treat the naive one as UTC
+            if (start_date.tzinfo is None) != (end_date.tzinfo is None):
+                if start_date.tzinfo is None:
+                    start_date = start_date.replace(tzinfo=timezone.utc)
+                else:
+                    end_date = end_date.replace(tzinfo=timezone.utc)
         else:
             # Auto-calculate "last 30 days" from current date
-            from datetime import timedelta
             end_date = datetime.now()
             start_date = end_date - timedelta(days=30)
             
@@ -1179,113 +2247,83 @@ def query_cost_management_direct(query_params: Dict[str, Any]) -> Dict[str, Any]
     except (KeyError, ValueError) as e:
         return {'error': f'Invalid date format. Use ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS): {str(e)}'}
     
+    handler = _COST_QUERY_HANDLERS.get(query_type)
+    if not handler:
+        return {'error': f'Invalid query_type: {query_type}. Valid types: {", ".join(_COST_QUERY_HANDLERS)}'}
+    
     # Initialize analyzer
     analyzer = CostManagementAnalyzer(subscription_id)
     
     # Execute query based on type
     try:
-        if query_type == 'subscription':
-            granularity = query_params.get('granularity', 'Daily')
-            return analyzer.get_subscription_costs(start_date, end_date, granularity)
-        
-        elif query_type == 'resource_group':
-            resource_group = query_params.get('resource_group')
-            if not resource_group:
-                return {'error': 'resource_group is required for resource_group query'}
-            granularity = query_params.get('granularity', 'Daily')
-            return analyzer.get_resource_group_costs(resource_group, start_date, end_date, granularity)
-        
-        elif query_type == 'service':
-            service_names = query_params.get('service_names')
-            if not service_names:
-                return {'error': 'service_names list is required for service query'}
-            return analyzer.get_resource_costs_by_service(service_names, start_date, end_date)
-        
-        elif query_type == 'top_resources':
-            top_n = query_params.get('top_n', 10)
-            return analyzer.get_top_cost_resources(start_date, end_date, top_n)
-        
-        elif query_type == 'budget':
-            return analyzer.get_budget_analysis(start_date, end_date)
-        
-        elif query_type == 'location':
-            return analyzer.get_cost_by_location(start_date, end_date)
-        
-        elif query_type == 'specific_resources':
-            resource_ids = query_params.get('resource_ids')
-            if not resource_ids:
-                return {'error': 'resource_ids list is required for specific_resources query'}
-            logging.info(f"Executing specific_resources cost query for {len(resource_ids)} resources")
-            return analyzer.get_specific_resources_cost(resource_ids, start_date, end_date)
-        
-        else:
-            return {'error': f'Invalid query_type: {query_type}. Valid types: subscription, resource_group, service, top_resources, budget, location, specific_resources'}
+        return handler(analyzer, query_params, start_date, end_date)
     
     except Exception as e:
         logging.error(f"Error executing cost query: {str(e)}")
         return {'error': str(e)}
 
 
+_COST_EXAMPLES_BODY = orjson.dumps({
+    "subscription_costs": {
+        "subscription_id": "your-subscription-id",
+        "query_type": "subscription",
+        "start_date": "2025-09-01T00:00:00Z",
+        "end_date": "2025-09-30T23:59:59Z",
+        "granularity": "Daily"
+    },
+    "resource_group_costs": {
+        "subscription_id": "your-subscription-id",
+        "query_type": "resource_group",
+        "resource_group": "my-resource-group",
+        "start_date": "2025-09-01T00:00:00Z",
+        "end_date": "2025-09-30T23:59:59Z"
+    },
+    "service_costs": {
+        "subscription_id": "your-subscription-id",
+        "query_type": "service",
+        "service_names": ["Virtual Machines", "Storage", "Networking"],
+        "start_date": "2025-09-01T00:00:00Z",
+        "end_date": "2025-09-30T23:59:59Z"
+    },
+    "top_resources": {
+        "subscription_id": "your-subscription-id",
+        "query_type": "top_resources",
+        "top_n": 10,
+        "start_date": "2025-09-01T00:00:00Z",
+        "end_date": "2025-09-30T23:59:59Z"
+    },
+    "specific_resources": {
+        "subscription_id": "your-subscription-id",
+        "query_type": "specific_resources",
+        "resource_ids": [
+            "/subscriptions/xxx/resourceGroups/rg/providers/Microsoft.Compute/virtualMachines/vm1",
+            "/subscriptions/xxx/resourceGroups/rg/providers/Microsoft.Storage/storageAccounts/storage1"
+        ],
+        "start_date": "2025-09-01T00:00:00Z",
+        "end_date": "2025-09-30T23:59:59Z"
+    },
+    "budget_analysis": {
+        "subscription_id": "your-subscription-id",
+        "query_type": "budget",
+        "start_date": "2025-09-01T00:00:00Z",
+        "end_date": "2025-09-30T23:59:59Z"
+    },
+    "location_costs": {
+        "subscription_id": "your-subscription-id",
+        "query_type": "location",
+        "start_date": "2025-09-01T00:00:00Z",
+        "end_date": "2025-09-30T23:59:59Z"
+    }
+}, option=orjson.OPT_INDENT_2)
+
+
 @app.function_name(name="CostManagementExample")
 @app.route(route="cost-example", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
 def cost_management_example(req: func.HttpRequest) -> func.HttpResponse:
     """Example endpoint showing different cost query structures"""
     
-    examples = {
-        "subscription_costs": {
-            "subscription_id": "your-subscription-id",
-            "query_type": "subscription",
-            "start_date": "2025-09-01T00:00:00Z",
-            "end_date": "2025-09-30T23:59:59Z",
-            "granularity": "Daily"
-        },
-        "resource_group_costs": {
-            "subscription_id": "your-subscription-id",
-            "query_type": "resource_group",
-            "resource_group": "my-resource-group",
-            "start_date": "2025-09-01T00:00:00Z",
-            "end_date": "2025-09-30T23:59:59Z"
-        },
-        "service_costs": {
-            "subscription_id": "your-subscription-id",
-            "query_type": "service",
-            "service_names": ["Virtual Machines", "Storage", "Networking"],
-            "start_date": "2025-09-01T00:00:00Z",
-            "end_date": "2025-09-30T23:59:59Z"
-        },
-        "top_resources": {
-            "subscription_id": "your-subscription-id",
-            "query_type": "top_resources",
-            "top_n": 10,
-            "start_date": "2025-09-01T00:00:00Z",
-            "end_date": "2025-09-30T23:59:59Z"
-        },
-        "specific_resources": {
-            "subscription_id": "your-subscription-id",
-            "query_type": "specific_resources",
-            "resource_ids": [
-                "/subscriptions/xxx/resourceGroups/rg/providers/Microsoft.Compute/virtualMachines/vm1",
-                "/subscriptions/xxx/resourceGroups/rg/providers/Microsoft.Storage/storageAccounts/storage1"
-            ],
-            "start_date": "2025-09-01T00:00:00Z",
-            "end_date": "2025-09-30T23:59:59Z"
-        },
-        "budget_analysis": {
-            "subscription_id": "your-subscription-id",
-            "query_type": "budget",
-            "start_date": "2025-09-01T00:00:00Z",
-            "end_date": "2025-09-30T23:59:59Z"
-        },
-        "location_costs": {
-            "subscription_id": "your-subscription-id",
-            "query_type": "location",
-            "start_date": "2025-09-01T00:00:00Z",
-            "end_date": "2025-09-30T23:59:59Z"
-        }
-    }
-    
     return func.HttpResponse(
-        body=json.dumps(examples, indent=2),
+        body=_COST_EXAMPLES_BODY,
         mimetype="application/json",
         status_code=200
     )